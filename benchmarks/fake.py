@@ -0,0 +1,94 @@
+"""In-process stand-in for the Lightwave websocket, answering from a SyntheticHub.
+
+FakeLightwaveLink is the integration's LightwaveSmartLink with only the websocket replaced, so the
+library's hierarchy handling and the link's event path run unchanged.
+"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from lightwave_smart.websocket import LWWebsocket
+
+from custom_components.lightwave_smart.link import LightwaveSmartLink
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FakeWebsocket(LWWebsocket):
+    """LWWebsocket answering requests in process, with an optional delay per request."""
+
+    def __init__(self, auth, hub, latency=0):
+        super().__init__(auth)
+        self.hub = hub
+        self.latency = latency
+        self.requests = 0
+
+    @property
+    def connected(self):
+        return self._active and self._websocket is not None
+
+    def activate(self, source=None):
+        self._active = True
+
+    async def async_deactivate(self, source=None):
+        self._active = None
+        self._websocket = None
+        self._connect_callbacks = []
+
+    async def async_connect(self, max_tries=None, force_keep_alive_secs=0, source=None):
+        self._websocket = SimpleNamespace(closed=False)
+        for callback in self._connect_callbacks:
+            await callback()
+        return True
+
+    async def async_sendmessage(self, message, redact=False, immediate=False):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        responses = []
+        for item in message.get_items():
+            success, payload = self.hub.respond(message.opclass, message.operation, item.get("payload"))
+            response = {"itemId": item["itemId"], "success": success}
+            response["payload" if success else "error"] = payload
+            responses.append(response)
+            if message.item_received_cb:
+                message.item_received_cb(response)
+
+            if success and (message.opclass, message.operation) == ("feature", "write"):
+                # the backend confirms a write with an event, as for a change made elsewhere
+                task = asyncio.create_task(self.async_push_event(payload["featureId"], payload["value"]))
+                self.background_tasks.add(task)
+                task.add_done_callback(self.background_tasks.discard)
+        return responses
+
+    async def async_push(self, message):
+        """Deliver a notification as the consumer handler would."""
+        handlers = self._eventHandlers.get(message["class"], {})
+        for func in handlers.get(message["operation"], []) + handlers.get(None, []):
+            await func(message)
+
+    async def async_push_event(self, feature_id, value):
+        await self.async_push({
+            "class": "feature",
+            "operation": "event",
+            "direction": "notification",
+            "items": [{"payload": {"featureId": feature_id, "value": value}}],
+        })
+
+
+class FakeLightwaveLink(LightwaveSmartLink):
+    """LightwaveSmartLink connected to a SyntheticHub instead of the Lightwave cloud."""
+
+    def __init__(self, session, hub, latency=0):
+        super().__init__(session)
+        ws = FakeWebsocket(self.auth, hub, latency)
+        ws._eventHandlers = self._ws._eventHandlers
+        self._ws = ws
+
+    @property
+    def hub(self):
+        return self._ws.hub
+
+    async def async_push_event(self, feature_id, value):
+        await self._ws.async_push_event(feature_id, value)
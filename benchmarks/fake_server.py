@@ -0,0 +1,325 @@
+"""Local stand-in for the Lightwave auth server and websocket, answering from a Hub.
+
+    python -m benchmarks.fake_server --featuresets 2000 --port 8765 --latency 50 --script benchmarks/scripts/flaky.json
+
+Implements what the integration uses through lightwave_smart: token requests (password, refresh
+token and API key), websocket authentication, the hierarchy reads, feature reads and writes (a
+write is confirmed with an event to every connection) and pushed feature events. Latency, errors,
+unanswered requests, disconnects and token expiry can be set up front or scripted over time.
+
+The cloud URLs are fixed in lightwave_smart, soak.py redirects them to this server. With --local-hub
+the websocket accepts any access token, as a hub on the LAN accepts the account's cloud token.
+soak.py --local runs a second server as the link's local hub. A real Home Assistant instance can
+connect to it too (local URL option), but its features are not in the synthetic hierarchy, so every
+local write is rejected and resent via the cloud.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import secrets
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+from aiohttp import WSMsgType, web
+from lightwave_smart.auth import LOGIN_ENDPOINT
+
+from .synthetic import SyntheticHub
+
+_LOGGER = logging.getLogger(__name__)
+
+SENDER_ID = "fake-lightwave-server"
+EVENT_TICK = 0.1            # seconds between batches of generated events
+
+# scripted actions that set an attribute of the server
+SETTINGS = ("latency", "jitter", "error_rate", "drop_rate", "event_rate", "token_lifetime")
+
+
+class FakeLightwaveServer:
+    """aiohttp server for the Lightwave auth and websocket protocol.
+
+    latency, jitter: seconds added to every request (jitter uniformly random)
+    error_rate: fraction of request items answered with an error
+    drop_rate: fraction of requests never answered
+    event_rate: feature events generated per second, pushed to all connections
+    token_lifetime: seconds until an issued access token expires
+    local_hub: accept any access token, as the local hub does (the token is issued by the cloud)
+    """
+
+    def __init__(self, hub, latency=0, jitter=0, error_rate=0, drop_rate=0, event_rate=0, token_lifetime=3600,
+                 credentials=None, local_hub=False, seed=0):
+        self.hub = hub
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.event_rate = event_rate
+        self.token_lifetime = token_lifetime
+        self.credentials = credentials      # (username, password), any are accepted if None
+        self.local_hub = local_hub
+
+        self.rng = random.Random(seed)
+        self.stats = Counter()
+        self.url = None
+        self.ws_url = None
+
+        self._access_tokens = {}            # token -> monotonic expiry
+        self._refresh_tokens = set()
+        self._connections = set()
+        self._transaction_id = 0
+        self._runner = None
+        self._tasks = set()
+
+    #########################################################
+    # Lifecycle
+    #########################################################
+
+    async def async_start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_post(LOGIN_ENDPOINT, self._handle_token)
+        app.router.add_post("/token", self._handle_token)
+        app.router.add_get("/", self._handle_websocket)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}"
+        self.ws_url = f"ws://{host}:{port}/"
+        self._start_task(self._async_generate_events())
+        _LOGGER.info(f"FakeLightwaveServer: Listening on {self.url}")
+
+    async def async_stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.async_disconnect()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _start_task(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    #########################################################
+    # Faults
+    #########################################################
+
+    async def async_disconnect(self):
+        """Close every websocket, as the cloud does on a restart."""
+        connections = list(self._connections)
+        self.stats["disconnects"] += len(connections)
+        await asyncio.gather(*[connection.ws.close() for connection in connections], return_exceptions=True)
+
+    def expire_tokens(self):
+        """Expire every issued access token, the next websocket authentication needs a refreshed token."""
+        self._access_tokens = dict.fromkeys(self._access_tokens, 0)
+
+    async def async_run_script(self, steps):
+        """Apply scripted steps, [{"at": seconds, "action": name, "value": value}, ...] in time order.
+
+        Actions are the settings (latency, jitter, error_rate, drop_rate, event_rate, token_lifetime),
+        "disconnect" and "expire_tokens".
+        """
+        start = time.monotonic()
+        for step in sorted(steps, key=lambda step: step["at"]):
+            await asyncio.sleep(max(0, start + step["at"] - time.monotonic()))
+            action = step["action"]
+            _LOGGER.info(f"FakeLightwaveServer: Script at {step['at']}s - {action} {step.get('value', '')}")
+            if action in SETTINGS:
+                setattr(self, action, step["value"])
+            elif action == "disconnect":
+                await self.async_disconnect()
+            elif action == "expire_tokens":
+                self.expire_tokens()
+            else:
+                _LOGGER.warning(f"FakeLightwaveServer: Unknown script action '{action}'")
+
+    #########################################################
+    # Auth
+    #########################################################
+
+    def _issue_tokens(self):
+        access_token = secrets.token_urlsafe(16)
+        refresh_token = secrets.token_urlsafe(16)
+        self._access_tokens[access_token] = time.monotonic() + self.token_lifetime
+        self._refresh_tokens.add(refresh_token)
+        return {"tokens": {"access_token": access_token, "refresh_token": refresh_token, "expires_in": self.token_lifetime}}
+
+    async def _handle_token(self, request):
+        body = await request.json()
+        if body.get("grant_type") == "refresh_token":
+            self.stats["token_refreshes"] += 1
+            if body.get("refresh_token") not in self._refresh_tokens:
+                return web.json_response({"error": "invalid_token", "error_description": "Unknown refresh token"}, status=400)
+            self._refresh_tokens.discard(body["refresh_token"])
+            return web.json_response(self._issue_tokens())
+
+        self.stats["logins"] += 1
+        if self.credentials is not None and (body.get("email"), body.get("password")) != self.credentials:
+            return web.json_response({"message": "User not found"}, status=404)
+        return web.json_response(self._issue_tokens())
+
+    def _authenticate(self, connection, payload):
+        if self.local_hub and payload.get("token"):
+            connection.authenticated = True
+            return True, {}
+        expiry = self._access_tokens.get(payload.get("token"))
+        if expiry is None:
+            return False, {"code": 405, "message": "Access denied"}
+        if expiry < time.monotonic():
+            return False, {"code": "401", "message": "user-msgs: Token not valid/expired."}
+        connection.authenticated = True
+        return True, {}
+
+    #########################################################
+    # Websocket
+    #########################################################
+
+    async def _handle_websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        connection = SimpleNamespace(ws=ws, authenticated=False)
+        self._connections.add(connection)
+        self.stats["connections"] += 1
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.TEXT:
+                    # requests are answered concurrently, as by the cloud
+                    self._start_task(self._async_handle_request(connection, message.json()))
+        finally:
+            self._connections.discard(connection)
+        return ws
+
+    async def _async_handle_request(self, connection, message):
+        opclass, operation = message["class"], message["operation"]
+        self.stats[f"{opclass}.{operation}"] += 1
+        if self.drop_rate and self.rng.random() < self.drop_rate:
+            self.stats["dropped"] += 1
+            return
+
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        items, events = [], []
+        for item in message["items"]:
+            if (opclass, operation) == ("user", "authenticate"):
+                success, payload = self._authenticate(connection, item.get("payload", {}))
+            elif not connection.authenticated:
+                success, payload = False, {"code": 405, "message": "Access denied"}
+            elif self.error_rate and self.rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                success, payload = False, {"code": "500", "message": "Scripted error"}
+            else:
+                success, payload = self.hub.respond(opclass, operation, item.get("payload"))
+                if success and (opclass, operation) == ("feature", "write"):
+                    events.append((payload["featureId"], payload["value"]))
+            items.append({"itemId": item["itemId"], "success": success, "payload" if success else "error": payload})
+
+        await self._async_send(connection, {
+            "version": 1,
+            "senderId": SENDER_ID,
+            "transactionId": message["transactionId"],
+            "direction": "response",
+            "class": opclass,
+            "operation": operation,
+            "items": items,
+        })
+        for feature_id, value in events:
+            await self.async_push_event(feature_id, value)
+
+    async def _async_send(self, connection, message):
+        if connection.ws.closed:
+            return
+        try:
+            await connection.ws.send_str(json.dumps(message))
+        except ConnectionError:
+            pass
+
+    async def async_push_event(self, feature_id, value):
+        """Push a feature event to every authenticated connection."""
+        self.hub.values[feature_id] = value
+        self._transaction_id += 1
+        message = {
+            "version": 1,
+            "senderId": SENDER_ID,
+            "transactionId": self._transaction_id,
+            "direction": "notification",
+            "class": "feature",
+            "operation": "event",
+            "items": [{"itemId": self._transaction_id, "payload": {"featureId": feature_id, "value": value}}],
+        }
+        self.stats["events"] += 1
+        for connection in list(self._connections):
+            if connection.authenticated:
+                await self._async_send(connection, message)
+
+    async def _async_generate_events(self):
+        if not hasattr(self.hub, "event_stream"):
+            return
+        stream = self.hub.event_stream()
+        due = 0.0
+        while True:
+            await asyncio.sleep(EVENT_TICK)
+            due += self.event_rate * EVENT_TICK
+            while due >= 1:
+                due -= 1
+                await self.async_push_event(*next(stream))
+
+
+async def async_main(args):
+    server = FakeLightwaveServer(
+        SyntheticHub(args.featuresets),
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        event_rate=args.event_rate,
+        token_lifetime=args.token_lifetime,
+        local_hub=args.local_hub,
+    )
+    await server.async_start(args.host, args.port)
+    print(f"Auth: {server.url}  Websocket: {server.ws_url}")
+    try:
+        if args.script:
+            await server.async_run_script(json.loads(args.script.read_text()))
+        await asyncio.Event().wait()
+    finally:
+        print(dict(server.stats))
+        await server.async_stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--featuresets", type=int, default=500, help="size of the synthetic hierarchy")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="ms added to every request")
+    parser.add_argument("--jitter", type=float, default=0, help="up to this many ms added at random")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of request items answered with an error")
+    parser.add_argument("--drop-rate", type=float, default=0, help="fraction of requests never answered")
+    parser.add_argument("--event-rate", type=float, default=0, help="feature events pushed per second")
+    parser.add_argument("--token-lifetime", type=int, default=3600, help="seconds until access tokens expire")
+    parser.add_argument("--script", type=Path, help="JSON list of timed steps, see FakeLightwaveServer.async_run_script")
+    parser.add_argument("--local-hub", action="store_true", help="accept any access token, to serve as the local hub")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(async_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
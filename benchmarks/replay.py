@@ -0,0 +1,117 @@
+"""Replay a capture from the lightwave_smart.capture service against the integration.
+
+    python -m benchmarks.replay lightwave_smart_capture_<entry>_<time>.jsonl.gz --speed 10
+
+The captured hierarchy is served by a CaptureHub, then the events are pushed through the link at
+their original timing (divided by --speed, 0 for as fast as possible), measuring the time the
+integration takes to handle each event and how far the replay falls behind the capture.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import time
+from pathlib import Path
+
+from .run import async_setup_instance
+from .synthetic import Hub
+
+
+class CaptureHub(Hub):
+    """The hierarchy and feature values recorded at the start of a capture."""
+
+    def __init__(self, hierarchy):
+        super().__init__(
+            groups={group["groupId"]: {"hierarchy": group["hierarchy"], "read": group["read"]} for group in hierarchy["groups"]},
+            values=dict(hierarchy["values"]),
+        )
+
+
+def load_capture(path):
+    """Return (header, hub, events), events are (seconds, featureId, value)."""
+    header, hub, events = None, None, []
+    with gzip.open(path, "rt", encoding="utf-8") as capture_file:
+        for line in capture_file:
+            record = json.loads(line)
+            record_type = record.get("type")
+            if record_type == "header":
+                header = record
+            elif record_type == "hierarchy":
+                hub = CaptureHub(record)
+            else:
+                events.append((record["t"], record["id"], record["v"]))
+    if header is None or hub is None:
+        raise ValueError(f"{path} is not a Lightwave capture")
+    return header, hub, events
+
+
+def percentiles(values, points=(50, 95, 99)):
+    if not values:
+        return {}
+    values = sorted(values)
+    result = {f"p{point}": round(values[min(len(values) - 1, len(values) * point // 100)], 3) for point in points}
+    result["max"] = round(values[-1], 3)
+    return result
+
+
+async def async_replay(instance, events, speed):
+    stats = instance.link.stats
+    callbacks = sum(stats.callbacks.values())
+    state_writes = sum(stats.state_writes.values())
+
+    handling, lag = [], []      # ms
+    start = time.perf_counter()
+    for elapsed, feature_id, value in events:
+        if speed:
+            delay = start + elapsed / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            lag.append(max(0, -delay) * 1000)
+
+        pushed = time.perf_counter()
+        await instance.link.async_push_event(feature_id, value)
+        handling.append((time.perf_counter() - pushed) * 1000)
+    await instance.hass.async_block_till_done()
+    duration = time.perf_counter() - start
+
+    count = max(len(events), 1)
+    return {
+        "events": len(events),
+        "duration_s": round(duration, 3),
+        "events_per_s": round(len(events) / duration, 1),
+        "state_writes_per_s": round((sum(stats.state_writes.values()) - state_writes) / duration, 1),
+        "callbacks_per_event": round((sum(stats.callbacks.values()) - callbacks) / count, 2),
+        "state_writes_per_event": round((sum(stats.state_writes.values()) - state_writes) / count, 2),
+        "handling_ms": percentiles(handling),
+        "lag_ms": percentiles(lag),
+    }
+
+
+async def async_main(args):
+    header, hub, events = load_capture(args.capture)
+    print(f"Capture: {header['events']} events over {header['seconds']}s, {len(hub.values)} features")
+
+    async with async_setup_instance(hub) as instance:
+        result = await async_replay(instance, events, args.speed)
+    result["speed"] = args.speed
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", type=Path, help="capture file (.jsonl.gz)")
+    parser.add_argument("--speed", type=float, default=1, help="replay speed, 1 for the original timing, 0 for as fast as possible")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.run(async_main(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
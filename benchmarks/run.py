@@ -0,0 +1,230 @@
+"""Benchmark config entry setup and feature event fan-out against synthetic hierarchies.
+
+    python -m benchmarks.run --sizes 50 500 2000 --output benchmarks/results/baseline.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+Each size is set up in a fresh test instance of Home Assistant, with the link answered in process
+by a SyntheticHub, so results depend on the integration (and Home Assistant) only.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from homeassistant import loader
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, __version__ as HA_VERSION
+from homeassistant.helpers import aiohttp_client
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_test_home_assistant
+
+from custom_components.lightwave_smart.const import DOMAIN, LIGHTWAVE_ENTITIES, LIGHTWAVE_LINK2, CONF_LW_AUTH_METHOD
+
+from .fake import FakeLightwaveLink
+from .synthetic import SyntheticHub
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = [50, 500, 2000]
+DEFAULT_EVENTS = 10000
+DEFAULT_THRESHOLD = 0.1
+
+# manifest dependencies that are not needed against a fake link, treated as already set up
+PRETEND_LOADED = {"application_credentials", "cloud", "http"}
+
+# metric -> True if higher is better
+METRICS = {
+    "setup_s": False,
+    "connect_and_hierarchy_s": False,
+    "platforms_s": False,
+    "entity_construction_us": False,
+    "memory_peak_mb": False,
+    "memory_retained_mb": False,
+    "memory_per_entity_kb": False,
+    "events_per_s": True,
+    "event_latency_p95_ms": False,
+}
+
+
+@asynccontextmanager
+async def async_setup_test_entry(setup_link, options=None):
+    """Home Assistant with the integration set up, the link created by setup_link(hass, config_entry).
+
+    setup_link replaces setup_link_lw, including when the entry is reloaded.
+    """
+    async with async_test_home_assistant() as hass:
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+        hass.config.components.update(PRETEND_LOADED)
+        hass.http = SimpleNamespace(register_view=lambda view: None)
+
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_LW_AUTH_METHOD: "password", CONF_USERNAME: "benchmark", CONF_PASSWORD: "benchmark"},
+            options=options or {},
+        )
+        entry.add_to_hass(hass)
+
+        with patch("custom_components.lightwave_smart.setup_link_lw", setup_link):
+            start = time.perf_counter()
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+            setup_time = time.perf_counter() - start
+
+            try:
+                yield SimpleNamespace(
+                    hass=hass, entry=entry, link=hass.data[DOMAIN][entry.entry_id][LIGHTWAVE_LINK2], setup_time=setup_time
+                )
+            finally:
+                await hass.config_entries.async_unload(entry.entry_id)
+                await hass.async_block_till_done()
+
+
+@asynccontextmanager
+async def async_setup_instance(hub, latency=0, options=None):
+    """Home Assistant with the integration set up against a hub (see synthetic.py), in process."""
+    async def setup_link(hass, config_entry):
+        return FakeLightwaveLink(aiohttp_client.async_get_clientsession(hass), hub, latency)
+
+    async with async_setup_test_entry(setup_link, options) as instance:
+        yield instance
+
+
+async def async_measure_memory(size):
+    """Peak and retained (after setup completes) memory of a setup, in MB."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        async with async_setup_instance(SyntheticHub(size)):
+            gc.collect()
+            retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2**20, 2), round(retained / 2**20, 2)
+
+
+async def async_measure_events(instance, count):
+    """Push events through the link to the entities, return events per second plus fan-out counts."""
+    stats = instance.link.stats
+    stream = instance.link.hub.event_stream()
+    events = [next(stream) for _ in range(count)]
+
+    callbacks = sum(stats.callbacks.values())
+    state_writes = sum(stats.state_writes.values())
+
+    start = time.perf_counter()
+    for feature_id, value in events:
+        await instance.link.async_push_event(feature_id, value)
+    await instance.hass.async_block_till_done()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "events_per_s": round(count / elapsed, 1),
+        "callbacks_per_event": round((sum(stats.callbacks.values()) - callbacks) / count, 2),
+        "state_writes_per_event": round((sum(stats.state_writes.values()) - state_writes) / count, 2),
+        "event_latency_p95_ms": stats.get_event_latency_percentiles().get("p95"),
+    }
+
+
+async def async_benchmark(size, events, latency, memory):
+    async with async_setup_instance(SyntheticHub(size), latency) as instance:
+        phases = instance.link.stats.setup_phases
+        entity_count = len(instance.hass.data[DOMAIN][instance.entry.entry_id][LIGHTWAVE_ENTITIES])
+        result = {
+            "featuresets": len(instance.link.featuresets),
+            "features": len(instance.link.features),
+            "entities": entity_count,
+            "setup_s": round(instance.setup_time, 4),
+            "connect_and_hierarchy_s": round(phases.get("connect_and_hierarchy", 0), 4),
+            "platforms_s": round(phases.get("platforms", 0) + phases.get("firmware_platforms", 0), 4),
+            "entity_construction_us": round(phases.get("platforms", 0) / max(entity_count, 1) * 1e6, 1),
+        }
+        result.update(await async_measure_events(instance, events))
+
+    if memory:
+        result["memory_peak_mb"], result["memory_retained_mb"] = await async_measure_memory(size)
+        result["memory_per_entity_kb"] = round(result["memory_retained_mb"] * 1024 / max(result["entities"], 1), 2)
+    return result
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print the change against the baseline per metric, return the regressions beyond the threshold."""
+    regressions = []
+    for size, result in results["results"].items():
+        previous = baseline["results"].get(size)
+        if previous is None:
+            print(f"{size} featuresets: not in baseline")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in result or not previous.get(metric):
+                continue
+            change = (result[metric] - previous[metric]) / previous[metric]
+            regressed = -change > threshold if higher_is_better else change > threshold
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{size:>6} {metric:<26} {previous[metric]:>12} -> {result[metric]:>12} {change:+8.1%}{flag}")
+            if regressed:
+                regressions.append((size, metric, change))
+    return regressions
+
+
+async def async_main(args):
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "homeassistant": HA_VERSION,
+        "events": args.events,
+        "latency_ms": args.latency,
+        "results": {},
+    }
+    for size in args.sizes:
+        result = await async_benchmark(size, args.events, args.latency / 1000, not args.no_memory)
+        results["results"][str(size)] = result
+        print(f"{size} featuresets: {json.dumps(result)}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="featureset counts to benchmark")
+    parser.add_argument("--events", type=int, default=DEFAULT_EVENTS, help="feature events pushed per size")
+    parser.add_argument("--latency", type=float, default=0, help="simulated request latency in ms")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slow) memory measurement")
+    parser.add_argument("--output", type=Path, help="results file, default results/<timestamp>.json")
+    parser.add_argument("--compare", type=Path, help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative change reported as a regression")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(async_main(args))
+
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
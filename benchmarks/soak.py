@@ -0,0 +1,177 @@
+"""Soak test reloads, reconnects and bulk commands against the fake Lightwave server.
+
+    python -m benchmarks.soak --featuresets 2000 --duration 600 --script benchmarks/scripts/flaky.json
+
+The integration is set up in a test instance of Home Assistant with its real link, whose auth and
+websocket URLs are redirected to a FakeLightwaveServer. Actions are then run in turn until the
+duration is up, while the server applies its script, and each action's duration and failures are
+reported along with the server's counters and whether the link ended up connected and the
+entities available.
+
+With --local a second server, serving the same hub, is set up as the link's local transport (the
+local URL option), so writes go over the local websocket and fall back to the cloud on errors.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from homeassistant.const import STATE_UNAVAILABLE
+
+from custom_components.lightwave_smart import reload_lw, setup_link_lw
+from custom_components.lightwave_smart.const import DOMAIN, LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, SERVICE_RECONNECT, SERVICE_UPDATE, \
+    CONF_LOCAL_URL
+
+from .fake_server import FakeLightwaveServer
+from .replay import percentiles
+from .run import async_setup_test_entry
+from .synthetic import SyntheticHub
+
+ACTIONS = ["bulk_command", "update_states", "reconnect", "bulk_command", "reload"]
+SETTLE_TIMEOUT = 60         # seconds for the link to reconnect at the end of the soak
+
+
+async def async_bulk_command(instance, count):
+    hass = instance.hass
+    entity_ids = (hass.states.async_entity_ids("light") + hass.states.async_entity_ids("switch"))[:count]
+    await hass.services.async_call("homeassistant", "toggle", {"entity_id": entity_ids}, blocking=True)
+
+
+async def async_update_states(instance, count):
+    await instance.hass.services.async_call(DOMAIN, SERVICE_UPDATE, {}, blocking=True)
+
+
+async def async_reconnect(instance, count):
+    await instance.hass.services.async_call(DOMAIN, SERVICE_RECONNECT, {}, blocking=True)
+
+
+async def async_reload(instance, count):
+    await reload_lw(instance.hass, instance.entry)
+
+
+ACTION_HANDLERS = {
+    "bulk_command": async_bulk_command,
+    "update_states": async_update_states,
+    "reconnect": async_reconnect,
+    "reload": async_reload,
+}
+
+
+async def async_wait_connected(instance):
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    while time.monotonic() < deadline:
+        link = instance.hass.data[DOMAIN].get(instance.entry.entry_id, {}).get(LIGHTWAVE_LINK2)
+        if link is not None and link._ws.connected:
+            return True
+        await asyncio.sleep(1)
+    return False
+
+
+async def async_soak(args):
+    hub = SyntheticHub(args.featuresets)
+    server = FakeLightwaveServer(
+        hub,
+        latency=args.latency / 1000,
+        event_rate=args.event_rate,
+        token_lifetime=args.token_lifetime,
+    )
+    await server.async_start()
+
+    options = {}
+    local_server = None
+    if args.local:
+        local_server = FakeLightwaveServer(hub, latency=args.local_latency / 1000, error_rate=args.local_error_rate, local_hub=True)
+        await local_server.async_start()
+        options[CONF_LOCAL_URL] = local_server.ws_url
+
+    async def setup_link(hass, config_entry):
+        link = await setup_link_lw(hass, config_entry)
+        link._ws._url = server.ws_url
+        return link
+
+    durations = {action: [] for action in ACTION_HANDLERS}
+    failures = {action: 0 for action in ACTION_HANDLERS}
+    try:
+        with patch("lightwave_smart.auth.PUBLIC_AUTH_SERVER", server.url):
+            async with async_setup_test_entry(setup_link, options) as instance:
+                script = server.async_run_script(json.loads(args.script.read_text())) if args.script else None
+                script_task = asyncio.create_task(script) if script else None
+                tasks_at_start = len(asyncio.all_tasks())
+
+                start = time.monotonic()
+                step = 0
+                while time.monotonic() - start < args.duration:
+                    action = ACTIONS[step % len(ACTIONS)]
+                    step += 1
+                    action_start = time.monotonic()
+                    try:
+                        await ACTION_HANDLERS[action](instance, args.bulk)
+                        await instance.hass.async_block_till_done()
+                        durations[action].append((time.monotonic() - action_start) * 1000)
+                    except Exception as e:
+                        failures[action] += 1
+                        logging.warning(f"soak: {action} failed - {e!r}")
+                    await asyncio.sleep(args.interval)
+
+                if script_task is not None:
+                    script_task.cancel()
+                connected = await async_wait_connected(instance)
+                await instance.hass.async_block_till_done()
+
+                entry_data = instance.hass.data[DOMAIN][instance.entry.entry_id]
+                unavailable = sum(
+                    1 for entity in entry_data[LIGHTWAVE_ENTITIES]
+                    if entity.entity_id and instance.hass.states.get(entity.entity_id)
+                    and instance.hass.states.get(entity.entity_id).state == STATE_UNAVAILABLE
+                )
+                result = {
+                    "featuresets": args.featuresets,
+                    "duration_s": round(time.monotonic() - start, 1),
+                    "connected": connected,
+                    "entities": len(entry_data[LIGHTWAVE_ENTITIES]),
+                    "unavailable": unavailable,
+                    "task_growth": len(asyncio.all_tasks()) - tasks_at_start,
+                    "actions_ms": {action: {"runs": len(values), **percentiles(values)} for action, values in durations.items()},
+                    "failures": failures,
+                    "server": dict(server.stats),
+                }
+                if local_server is not None:
+                    link = entry_data[LIGHTWAVE_LINK2]
+                    result["local_server"] = dict(local_server.stats)
+                    result["transport_writes"] = dict(link.transport_writes)
+    finally:
+        await server.async_stop()
+        if local_server is not None:
+            await local_server.async_stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--featuresets", type=int, default=500, help="size of the synthetic hierarchy")
+    parser.add_argument("--duration", type=float, default=300, help="seconds to keep running actions")
+    parser.add_argument("--interval", type=float, default=2, help="seconds between actions")
+    parser.add_argument("--bulk", type=int, default=50, help="entities toggled per bulk command")
+    parser.add_argument("--latency", type=float, default=20, help="ms the server adds to every request")
+    parser.add_argument("--event-rate", type=float, default=20, help="feature events pushed per second")
+    parser.add_argument("--token-lifetime", type=int, default=3600, help="seconds until access tokens expire")
+    parser.add_argument("--script", type=Path, help="server script, see FakeLightwaveServer.async_run_script")
+    parser.add_argument("--local", action="store_true", help="also connect the link's local transport to a local hub server")
+    parser.add_argument("--local-latency", type=float, default=2, help="ms the local hub server adds to every request")
+    parser.add_argument("--local-error-rate", type=float, default=0, help="fraction of local hub request items answered with an error")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.run(async_soak(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Synthetic Lightwave hierarchy, and the responses a Link Plus would give for it.
+
+Hub answers requests (opclass, operation, payload) the way the Lightwave backend does, for the
+group payloads it holds. SyntheticHub generates them for a structure of lights, sockets with
+energy monitoring, TRVs and remotes, CaptureHub (see replay.py) takes them from a capture.
+"""
+import itertools
+import random
+
+STRUCTURE_ID = "5f0c9ab3c1e7d1001a000001"
+LINK_ID = "1a2b3c"
+
+# featureset kind -> (product code, feature types), feature types are in primary feature order
+KINDS = {
+    "light": ("L21", ["switch", "dimLevel", "power", "energy", "rssi", "protection", "uiButtonPair"]),
+    "socket": ("L42", ["switch", "socketSetup", "power", "energy", "rssi", "voltage", "current", "protection", "outletInUse"]),
+    "trv": ("LW922", ["heatState", "targetTemperature", "temperature", "valveLevel", "valveSetup", "batteryLevel", "rssi"]),
+    "remote": ("LP70", ["uiButtonPair", "batteryLevel", "rssi"]),
+}
+DEFAULT_MIX = {"light": 4, "socket": 3, "trv": 2, "remote": 1}
+HUB_FEATURES = ["dawnTime", "duskTime", "day", "month", "year"]
+
+INITIAL_VALUES = {
+    "switch": 0, "dimLevel": 50, "power": 12, "energy": 150000, "rssi": -62, "protection": 0,
+    "socketSetup": 0, "voltage": 2400, "current": 50, "outletInUse": 0,
+    "heatState": 1, "targetTemperature": 200, "temperature": 195, "valveLevel": 40, "valveSetup": 0,
+    "batteryLevel": 90, "dawnTime": 25200, "duskTime": 64800, "day": 1, "month": 1, "year": 2026,
+}
+UNREADABLE = {"uiButtonPair"}
+
+# feature types whose events are generated by event_stream(), with a function for the next value
+EVENT_VALUES = {
+    "switch": lambda value, rng: 1 - value,
+    "dimLevel": lambda value, rng: rng.randint(1, 100),
+    "power": lambda value, rng: rng.randint(0, 2500),
+    "energy": lambda value, rng: value + rng.randint(1, 20),
+    "rssi": lambda value, rng: rng.randint(-90, -40),
+    "temperature": lambda value, rng: rng.randint(150, 250),
+    "valveLevel": lambda value, rng: rng.randint(0, 100),
+    "uiButtonPair": lambda value, rng: rng.choice([0x0101, 0x0201, 0x1101, 0x1201]),
+}
+
+
+def get_mix(featureset_count, mix=None):
+    """Split a featureset count over the kinds in proportion to the mix."""
+    mix = mix or DEFAULT_MIX
+    total = sum(mix.values())
+    counts = {kind: featureset_count * weight // total for kind, weight in mix.items()}
+    for kind in itertools.islice(itertools.cycle(mix), featureset_count - sum(counts.values())):
+        counts[kind] += 1
+    return counts
+
+
+class Hub:
+    """Link Plus request handling for a set of root groups.
+
+    Feature values are held here, so reads return what was last written or pushed.
+    """
+
+    def __init__(self, groups=None, values=None):
+        self.groups = groups or {}      # groupId -> {"hierarchy": group.hierarchy payload, "read": group.read payload}
+        self.values = values or {}      # featureId -> current value
+
+    @property
+    def group_ids(self):
+        return list(self.groups)
+
+    def respond(self, opclass, operation, payload):
+        """Return (success, response payload) for a request item."""
+        payload = payload or {}
+        if (opclass, operation) == ("user", "rootGroups"):
+            return True, {"groupIds": self.group_ids}
+        if (opclass, operation) in (("group", "hierarchy"), ("group", "read")):
+            group = self.groups.get(payload.get("groupId"))
+            if group is None:
+                return False, {"code": "NOT_FOUND", "message": "Group not found"}
+            return True, group[operation]
+        if (opclass, operation) == ("feature", "read"):
+            feature_id = payload.get("featureId")
+            if feature_id not in self.values:
+                return False, {"code": "NOT_FOUND", "message": "Feature not found"}
+            return True, {"featureId": feature_id, "value": self.values[feature_id]}
+        if (opclass, operation) == ("feature", "write"):
+            feature_id = payload.get("featureId")
+            if feature_id not in self.values:
+                return False, {"code": "NOT_FOUND", "message": "Feature not found"}
+            self.values[feature_id] = payload.get("value")
+            return True, {"featureId": feature_id, "value": self.values[feature_id]}
+        if (opclass, operation) == ("firmware", "readForDevice"):
+            return True, {"releases": []}
+        if (opclass, operation) == ("firmware", "readForProductCode"):
+            return True, {"firmwareVersions": []}
+        return False, {"code": "NOT_SUPPORTED", "message": f"{opclass}.{operation} is not supported"}
+
+
+class SyntheticHub(Hub):
+    """A generated structure of featuresets, see KINDS."""
+
+    def __init__(self, featureset_count, mix=None, seed=0, structure_name="Synthetic Home"):
+        super().__init__()
+        self.rng = random.Random(seed)
+
+        self.featuresets = []       # hierarchy featureSet items
+        self.devices = {}           # deviceId -> group.read device item
+        self.features = {}          # featureId -> group.read feature item
+        self.kinds = {}             # featureset id -> kind
+
+        self.hub_featureset_id = self._add_featureset("hub", "L2", HUB_FEATURES, "Link Plus", 0)
+        index = 1
+        for kind, count in get_mix(featureset_count, mix).items():
+            product_code, feature_types = KINDS[kind]
+            for _ in range(count):
+                self._add_featureset(kind, product_code, feature_types, f"{kind.title()} {index}", index)
+                index += 1
+
+        self.groups[STRUCTURE_ID] = {
+            "hierarchy": {
+                "featureSet": self.featuresets,
+                "link": [{"featureSets": [self.hub_featureset_id]}],
+                "root": [{"groupId": STRUCTURE_ID, "name": structure_name}],
+            },
+            "read": {"devices": self.devices, "features": self.features},
+        }
+
+    def _add_featureset(self, kind, product_code, feature_types, name, index):
+        featureset_id = f"{STRUCTURE_ID}-{index}"
+        device_id = f"{STRUCTURE_ID}-{index}-{LINK_ID}+1"
+        feature_ids = []
+        for channel, feature_type in enumerate(feature_types):
+            feature_id = f"{featureset_id}-{channel}"
+            feature_ids.append(feature_id)
+            self.features[feature_id] = {
+                "featureId": feature_id,
+                "deviceId": device_id,
+                "attributes": {"type": feature_type, "channel": 0, "writable": feature_type not in UNREADABLE},
+            }
+            self.values[feature_id] = INITIAL_VALUES.get(feature_type, 0)
+
+        self.devices[device_id] = {
+            "deviceId": device_id,
+            "featureIds": feature_ids,
+            "productCode": product_code,
+            "manufacturerCode": "LightwaveRF",
+            "firmwareVersion": "5.00.0",
+            "serial": f"SN{index:06d}",
+        }
+        self.featuresets.append({
+            "groupId": featureset_id,
+            "deviceId": device_id,
+            "name": name,
+            "features": feature_ids,
+            "primaryFeatureId": feature_ids[0],
+        })
+        self.kinds[featureset_id] = kind
+        return featureset_id
+
+    def get_feature_type(self, feature_id):
+        return self.features[feature_id]["attributes"]["type"]
+
+    def next_event(self, feature_id):
+        """Change a feature as a device would, returning its new value."""
+        feature_type = self.get_feature_type(feature_id)
+        value = EVENT_VALUES[feature_type](self.values[feature_id], self.rng)
+        self.values[feature_id] = value
+        return value
+
+    def event_stream(self):
+        """Endless (featureId, value) events spread over the structure, in a repeatable order."""
+        feature_ids = [
+            feature_id for feature_id, feature in self.features.items()
+            if feature["attributes"]["type"] in EVENT_VALUES
+        ]
+        while True:
+            feature_id = self.rng.choice(feature_ids)
+            yield feature_id, self.next_event(feature_id)
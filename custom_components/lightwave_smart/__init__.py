@@ -1,24 +1,69 @@
 import logging
 import voluptuous as vol
 import asyncio
+from collections import Counter
 
-from .const import DOMAIN, LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, LIGHTWAVE_PLATFORMS, \
-    SERVICE_RECONNECT, SERVICE_UPDATE, CONF_LW_AUTH_METHOD, CONF_API_KEY, \
-    CONF_REFRESH_TOKEN, CONF_ACCESS_TOKEN, CONF_TOKEN_EXPIRY, SERVICE_RESET_ENABLED_STATUS_TO_DEFAULTS
+from .const import DOMAIN, LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, LIGHTWAVE_PLATFORMS, LIGHTWAVE_COUNTERS, LIGHTWAVE_SCHEDULER, \
+    SERVICE_RECONNECT, SERVICE_UPDATE, SERVICE_PROFILE, SERVICE_CAPTURE, ATTR_SECONDS, CONF_LW_AUTH_METHOD, CONF_API_KEY, \
+    CONF_REFRESH_TOKEN, CONF_ACCESS_TOKEN, CONF_TOKEN_EXPIRY, SERVICE_RESET_ENABLED_STATUS_TO_DEFAULTS, \
+    CONF_COMMAND_CONCURRENCY, CONF_COMMAND_RATE, DEFAULT_COMMAND_CONCURRENCY, DEFAULT_COMMAND_RATE, ATTR_CONFIG_ENTRY_ID, \
+    LIGHTWAVE_SWEEPER, LIGHTWAVE_RESYNC, LIGHTWAVE_WATCHDOG, CONF_SWEEP_INTERVAL, CONF_SWEEP_BATCH, DEFAULT_SWEEP_INTERVAL, DEFAULT_SWEEP_BATCH, \
+    CONF_KEEP_ALIVE_MODE, CONF_KEEP_ALIVE_INTERVAL, DEFAULT_KEEP_ALIVE_MODE, DEFAULT_KEEP_ALIVE_INTERVAL, CONF_LOCAL_URL, \
+    CONF_STRUCTURES, DEFAULT_STRUCTURES, CONF_ENERGY_BACKFILL, DEFAULT_ENERGY_BACKFILL, LIGHTWAVE_BACKFILL, \
+    SERVICE_BACKFILL_ENERGY, ATTR_HOURS
 from homeassistant.config_entries import ConfigEntry, ConfigEntryAuthFailed
-from homeassistant.const import (CONF_USERNAME, CONF_PASSWORD, CONF_TOKEN)
+from homeassistant.const import (CONF_USERNAME, CONF_PASSWORD, CONF_TOKEN, ATTR_AREA_ID, ATTR_DEVICE_ID, ATTR_ENTITY_ID)
 from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers import (
     device_registry as dr,
     entity_registry as er,
     config_validation as cv,
     config_entry_oauth2_flow,
     aiohttp_client,
+    service,
 )
 from .utils import get_stored_tokens, set_stored_tokens
+from .scheduler import CommandScheduler, PRIORITY_BULK
+from .refresh import async_read_featuresets, get_identifier_featureset_ids, FeaturesetSweeper, LinkResync
+from .watchdog import LinkWatchdog, KeepAliveTuner
+from .metrics import LightwaveMetricsView
+from .profiler import ScopedProfiler, start_profile
+from .capture import LinkCapture
+from .energy import EnergyBackfill, DEFAULT_BACKFILL_HOURS
 
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
+ENTRY_SERVICE_SCHEMA = vol.Schema(
+    {
+        **cv.ENTITY_SERVICE_FIELDS,
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
+PROFILE_SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SECONDS, default=60): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
+CAPTURE_SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SECONDS, default=300): vol.All(vol.Coerce(int), vol.Range(min=1, max=86400)),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
+BACKFILL_SERVICE_SCHEMA = vol.Schema(
+    {
+        **cv.ENTITY_SERVICE_FIELDS,
+        vol.Optional(ATTR_HOURS, default=DEFAULT_BACKFILL_HOURS): vol.All(vol.Coerce(int), vol.Range(min=1, max=8760)),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 # Define supported platforms
@@ -30,24 +75,108 @@ def async_central_callback(**kwargs):
 
 async def async_setup(hass, config):
     
+    async def async_reconnect_entry(entry_id):
+        watchdog = hass.data[DOMAIN][entry_id][LIGHTWAVE_WATCHDOG]
+        # waits for the first attempts only, during an outage the reconnect keeps retrying in the background
+        if not await watchdog.async_reconnect_wait("service_handle_reconnect"):
+            _LOGGER.warning(f"Lightwave link of config entry '{entry_id}' not reconnected yet, retrying in the background")
+
+    async def async_update_entry_states(entry_id, featureset_ids):
+        # entities are only written by their feature callbacks, for features whose value has changed
+        link = hass.data[DOMAIN][entry_id][LIGHTWAVE_LINK2]
+        scheduler = hass.data[DOMAIN][entry_id][LIGHTWAVE_SCHEDULER]
+        try:
+            if featureset_ids is None:
+                await scheduler.async_run(link.async_update_featureset_states, priority=PRIORITY_BULK)
+            else:
+                await scheduler.async_run(async_read_featuresets, link, featureset_ids, link.get_wanted_features(), priority=PRIORITY_BULK)
+        except Exception as e:
+            _LOGGER.error("Error updating Lightwave states: %s", e)
+
     async def service_handle_reconnect(call):
-        _LOGGER.debug("Received service call reconnect")
-        for entry_id in hass.data[DOMAIN]:
-            link = hass.data[DOMAIN][entry_id][LIGHTWAVE_LINK2]
-            try:
-                await link.async_deactivate(source="service_handle_reconnect")
-                await link.async_activate(source="service_handle_reconnect", connect_callback=link.async_get_hierarchy)
-            except Exception as e:
-                _LOGGER.error("Error deactivating Lightwave link: %s", e)
+        targets = get_service_targets(hass, call)
+        _LOGGER.debug(f"Received service call reconnect - entries: {list(targets)}")
+        await asyncio.gather(*[async_reconnect_entry(entry_id) for entry_id in targets])
 
     async def service_handle_update_states(call):
-        _LOGGER.debug("Received service call update states")
-        for entry_id in hass.data[DOMAIN]:
+        targets = get_service_targets(hass, call)
+        _LOGGER.debug(f"Received service call update states - targets: {targets}")
+        await asyncio.gather(*[
+            async_update_entry_states(entry_id, featureset_ids) for entry_id, featureset_ids in targets.items()
+        ])
+
+    async def service_handle_profile(call):
+        seconds = call.data[ATTR_SECONDS]
+        targets = []
+        for entry_id in get_service_targets(hass, call):
+            if hass.data[DOMAIN][entry_id][LIGHTWAVE_LINK2].stats.profiler is not None:
+                _LOGGER.warning(f"profile: Already profiling config entry '{entry_id}'")
+                continue
+            targets.append(entry_id)
+        if not targets:
+            return
+
+        # enabled once for the run, never from the callbacks, enabling fails if another profiler is active
+        profile = start_profile()
+        if profile is None:
+            return
+
+        profiling = {}
+        for entry_id in targets:
+            stats = hass.data[DOMAIN][entry_id][LIGHTWAVE_LINK2].stats
+            stats.profiler = ScopedProfiler(profile)
+            profiling[entry_id] = stats
+
+        _LOGGER.info(f"profile: Profiling {len(profiling)} config entries for {seconds}s")
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+            profilers = {}
+            for entry_id, stats in profiling.items():
+                profilers[entry_id] = stats.profiler
+                stats.profiler = None
+
+        timestamp = dt_util.now().strftime("%Y%m%d_%H%M%S")
+        for entry_id, profiler in profilers.items():
+            path = hass.config.path(f"lightwave_smart_profile_{entry_id}_{timestamp}.txt")
+            await hass.async_add_executor_job(write_profile_report, path, profiler, seconds)
+            _LOGGER.info(f"profile: Report written to {path}")
+
+    async def service_handle_capture(call):
+        seconds = call.data[ATTR_SECONDS]
+        capturing = {}
+        for entry_id in get_service_targets(hass, call):
             link = hass.data[DOMAIN][entry_id][LIGHTWAVE_LINK2]
-            await link.async_update_featureset_states()
-            for ent in hass.data[DOMAIN][entry_id][LIGHTWAVE_ENTITIES]:
-                if ent.hass is not None:
-                    ent.async_schedule_update_ha_state(True)
+            if link.capture is not None:
+                _LOGGER.warning(f"capture: Already capturing config entry '{entry_id}'")
+                continue
+            link.capture = LinkCapture(link)
+            capturing[entry_id] = link
+
+        _LOGGER.info(f"capture: Capturing {len(capturing)} config entries for {seconds}s")
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            captures = {}
+            for entry_id, link in capturing.items():
+                captures[entry_id] = link.capture
+                link.capture = None
+
+        timestamp = dt_util.now().strftime("%Y%m%d_%H%M%S")
+        for entry_id, capture in captures.items():
+            path = hass.config.path(f"lightwave_smart_capture_{entry_id}_{timestamp}.jsonl.gz")
+            await hass.async_add_executor_job(capture.write, path, seconds)
+            _LOGGER.info(f"capture: {len(capture.events)} events written to {path}")
+
+    async def service_handle_backfill_energy(call):
+        hours = call.data[ATTR_HOURS]
+        targets = get_service_targets(hass, call)
+        _LOGGER.debug(f"Received service call backfill energy - hours: {hours} - targets: {targets}")
+        await asyncio.gather(*[
+            hass.data[DOMAIN][entry_id][LIGHTWAVE_BACKFILL].async_run(hours, featureset_ids)
+            for entry_id, featureset_ids in targets.items()
+        ])
 
     async def service_handle_reset_enabled_status_to_defaults(call):
         """Reset enabled status to defaults."""
@@ -89,9 +218,14 @@ async def async_setup(hass, config):
         
         _LOGGER.info(f"reset_enabled_status_to_defaults: Entities have been reset to defaults: {enabled_count} of {count}")
 
-    hass.services.async_register(DOMAIN, SERVICE_RECONNECT, service_handle_reconnect)
-    hass.services.async_register(DOMAIN, SERVICE_UPDATE, service_handle_update_states)
+    hass.services.async_register(DOMAIN, SERVICE_RECONNECT, service_handle_reconnect, schema=ENTRY_SERVICE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_UPDATE, service_handle_update_states, schema=ENTRY_SERVICE_SCHEMA)
     hass.services.async_register(DOMAIN, SERVICE_RESET_ENABLED_STATUS_TO_DEFAULTS, service_handle_reset_enabled_status_to_defaults)
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, service_handle_profile, schema=PROFILE_SERVICE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_CAPTURE, service_handle_capture, schema=CAPTURE_SERVICE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_BACKFILL_ENERGY, service_handle_backfill_energy, schema=BACKFILL_SERVICE_SCHEMA)
+    
+    hass.http.register_view(LightwaveMetricsView())
     
     return True
 
@@ -103,8 +237,12 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     config_entry.async_on_unload(config_entry.add_update_listener(reload_lw))
     
     link = await setup_link_lw(hass, config_entry)
+    link.structure_filter = set(config_entry.options.get(CONF_STRUCTURES, DEFAULT_STRUCTURES))
+    resync = LinkResync(hass, config_entry, link)
     try:
-        connected = await link.async_activate(source="hass", connect_callback=link.async_get_hierarchy)
+        # full hierarchy on the first connect, states only on reconnects unless the structure has changed
+        with link.stats.phase("connect_and_hierarchy"):
+            connected = await link.async_activate(source="hass", connect_callback=resync.async_on_connect)
         if not connected:
             raise ConfigEntryAuthFailed("Failed to connect to Lightwave service. Please check your credentials.")
     except Exception as e:
@@ -112,8 +250,24 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
         raise ConfigEntryAuthFailed(f"Authentication failed: {str(e)}")
 
     hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_LINK2] = link
+    hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_RESYNC] = resync
+    keep_alive = KeepAliveTuner(
+        config_entry.options.get(CONF_KEEP_ALIVE_INTERVAL, DEFAULT_KEEP_ALIVE_INTERVAL),
+        config_entry.options.get(CONF_KEEP_ALIVE_MODE, DEFAULT_KEEP_ALIVE_MODE) == "adaptive",
+    )
+    hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_WATCHDOG] = LinkWatchdog(hass, link, resync, keep_alive)
     hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_ENTITIES] = []
     hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_PLATFORMS] = []
+    hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_COUNTERS] = Counter()
+
+    scheduler = CommandScheduler(
+        hass,
+        config_entry.options.get(CONF_COMMAND_CONCURRENCY, DEFAULT_COMMAND_CONCURRENCY),
+        config_entry.options.get(CONF_COMMAND_RATE, DEFAULT_COMMAND_RATE),
+        link.stats,
+    )
+    scheduler.start()
+    hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_SCHEDULER] = scheduler
 
     device_registry = dr.async_get(hass)
     entity_registry = er.async_get(hass)
@@ -135,16 +289,37 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry):
     remove_missing_devices_and_entities(config_entry, link, device_registry, entity_registry)
     
     try:
-        await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS_FIRMWARE)
+        with link.stats.phase("firmware_platforms"):
+            await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS_FIRMWARE)
         hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_PLATFORMS].extend(PLATFORMS_FIRMWARE)
     except Exception as e:
         _LOGGER.warning("No firmware platforms loaded: %s", e)
     
     try:
-        await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+        with link.stats.phase("platforms"):
+            await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
         hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_PLATFORMS].extend(PLATFORMS)
     except Exception as e:
         _LOGGER.warning("Some main platforms not loaded: %s", e)
+
+    # from here on events of features without an enabled entity are dropped, and not read in bulk
+    link.prune_events = True
+    
+    sweep_interval = config_entry.options.get(CONF_SWEEP_INTERVAL, DEFAULT_SWEEP_INTERVAL)
+    if sweep_interval:
+        sweeper = FeaturesetSweeper(hass, link, scheduler, sweep_interval, config_entry.options.get(CONF_SWEEP_BATCH, DEFAULT_SWEEP_BATCH))
+        await sweeper.async_start()
+        hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_SWEEPER] = sweeper
+
+    backfill = EnergyBackfill(hass, config_entry, link)
+    hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_BACKFILL] = backfill
+    if config_entry.options.get(CONF_ENERGY_BACKFILL, DEFAULT_ENERGY_BACKFILL):
+        # once started, the recorder has compiled its statistics and the energy states have been read
+        async def async_backfill_at_start(_hass):
+            hass.async_create_background_task(backfill.async_run(), "lightwave_smart energy backfill")
+        config_entry.async_on_unload(async_at_started(hass, async_backfill_at_start))
+    
+    await hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_WATCHDOG].async_start()
     
     return True
 
@@ -171,6 +346,15 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry, sou
     else:
         _LOGGER.warning(f"No platforms were loaded for config entry '{config_entry.entry_id}'")
     
+    if LIGHTWAVE_WATCHDOG in entry_data:
+        await entry_data[LIGHTWAVE_WATCHDOG].async_stop()
+    
+    if LIGHTWAVE_SWEEPER in entry_data:
+        entry_data[LIGHTWAVE_SWEEPER].stop()
+    
+    if LIGHTWAVE_SCHEDULER in entry_data:
+        await entry_data[LIGHTWAVE_SCHEDULER].async_stop()
+    
     # Clean up connection to Lightwave backend
     if LIGHTWAVE_LINK2 in entry_data:
         link = entry_data[LIGHTWAVE_LINK2]
@@ -199,7 +383,10 @@ async def reload_lw(hass, config_entry):
     await async_setup_entry(hass=hass, config_entry=config_entry)
 
 async def setup_link_lw(hass, config_entry):
-    from lightwave_smart import lightwave_smart
+    from .link import LightwaveSmartLink
+    
+    session = aiohttp_client.async_get_clientsession(hass)
+    local_url = config_entry.options.get(CONF_LOCAL_URL) or None
     
     auth_method = CONF_LW_AUTH_METHOD in config_entry.data and config_entry.data[CONF_LW_AUTH_METHOD] or 'password'
     username = CONF_USERNAME in config_entry.data and config_entry.data[CONF_USERNAME] or None
@@ -230,14 +417,21 @@ async def setup_link_lw(hass, config_entry):
                 hass, config_entry
             )
         )
-        session = config_entry_oauth2_flow.OAuth2Session(hass, config_entry, implementation)
+        oauth_session = config_entry_oauth2_flow.OAuth2Session(hass, config_entry, implementation)
         
-        lightwaveSmartAuth = LightwaveSmartAuth(session)
-        link = lightwave_smart.LWLink2(auth=lightwaveSmartAuth)
+        lightwaveSmartAuth = LightwaveSmartAuth(oauth_session)
+        link = LightwaveSmartLink(session, auth=lightwaveSmartAuth, local_url=local_url)
+
+        def on_oauth_token_refresh(access_token, refresh_token, token_expiry):
+            # stored in the config entry by the OAuth2 session
+            link.stats.token_refreshes += 1
+
+        lightwaveSmartAuth.set_token_refresh_callback(on_oauth_token_refresh)
         
     else:
         def on_token_refresh(access_token, refresh_token, token_expiry):
             _LOGGER.info("Updating tokens in storage")
+            link.stats.token_refreshes += 1
             asyncio.create_task(
                 set_stored_tokens(hass=hass, username=username, tokens={ 
                     CONF_ACCESS_TOKEN: access_token, 
@@ -246,7 +440,7 @@ async def setup_link_lw(hass, config_entry):
                 })
             )
             
-        link = lightwave_smart.LWLink2()
+        link = LightwaveSmartLink(session, local_url=local_url)
         link.auth.set_token_refresh_callback(on_token_refresh)
         
         if auth_method == "password":
@@ -278,3 +472,51 @@ def remove_missing_devices_and_entities(config_entry, link, device_registry, ent
         ):
             _LOGGER.debug(f"Entity registry item: {entity_entry}")
             _LOGGER.debug(f"Entity: {entity_registry.async_get(entity_entry.entity_id)}")
+
+def write_profile_report(path, profiler, seconds):
+    with open(path, "w") as report_file:
+        report_file.write(profiler.report(seconds))
+
+def get_service_targets(hass, call):
+    """Return { entry_id: featureset_ids } for the loaded config entries targeted by a service call.
+
+    featureset_ids is None (all featuresets) when the call has no entity, device or area target.
+    """
+    entry_ids = [
+        entry.entry_id for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id in hass.data.get(DOMAIN, {})
+    ]
+
+    if ATTR_CONFIG_ENTRY_ID in call.data:
+        entry_ids = [entry_id for entry_id in entry_ids if entry_id == call.data[ATTR_CONFIG_ENTRY_ID]]
+
+    if not any(key in call.data for key in (ATTR_ENTITY_ID, ATTR_DEVICE_ID, ATTR_AREA_ID)):
+        return {entry_id: None for entry_id in entry_ids}
+
+    selected = service.async_extract_referenced_entity_ids(hass, call)
+    entity_ids = selected.referenced | selected.indirectly_referenced
+    device_registry = dr.async_get(hass)
+
+    targets = {}
+    for entry_id in entry_ids:
+        entry_data = hass.data[DOMAIN][entry_id]
+        link = entry_data[LIGHTWAVE_LINK2]
+        
+        featureset_ids = set()
+        for device_id in selected.referenced_devices:
+            device_entry = device_registry.async_get(device_id)
+            if device_entry is None or entry_id not in device_entry.config_entries:
+                continue
+            for domain, identifier in device_entry.identifiers:
+                if domain == DOMAIN:
+                    featureset_ids.update(get_identifier_featureset_ids(link, identifier))
+
+        for ent in entry_data[LIGHTWAVE_ENTITIES]:
+            if ent.entity_id in entity_ids:
+                identifier = getattr(ent, "_featureset_id", None) or getattr(ent, "_device_id", None)
+                featureset_ids.update(get_identifier_featureset_ids(link, identifier))
+
+        if featureset_ids:
+            targets[entry_id] = featureset_ids
+
+    return targets
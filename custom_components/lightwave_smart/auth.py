@@ -5,7 +5,7 @@ from typing import cast
 import asyncio
 
 from homeassistant.components import cloud
-from homeassistant.helpers import config_entry_oauth2_flow
+from homeassistant.helpers import aiohttp_client, config_entry_oauth2_flow
 
 from .auth_const import LW_API_SCOPES
 from lightwave_smart import lightwave_smart
@@ -42,7 +42,24 @@ class CustomOAuth2Session(config_entry_oauth2_flow.OAuth2Session):
         
         return super().valid_token
     
-class LightwaveSmartAuth(lightwave_smart.LWAuth):
+class HassSessionAuth(lightwave_smart.LWAuth):
+    """Lightwave Smart authentication using Home Assistant's shared aiohttp session.
+
+    The shared session is owned by Home Assistant, so it is never closed here.
+    """
+
+    def __init__(self, session, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._shared_session = session
+
+    async def open(self):
+        self._session = self._shared_session
+
+    async def close(self):
+        self._session = None
+
+
+class LightwaveSmartAuth(HassSessionAuth):
     """Provide Lightwave Smart authentication tied to an OAuth2 based config entry."""
 
     def __init__(
@@ -50,7 +67,7 @@ class LightwaveSmartAuth(lightwave_smart.LWAuth):
         oauth_session: config_entry_oauth2_flow.OAuth2Session,
     ) -> None:
         """Initialize the auth."""
-        super().__init__()
+        super().__init__(aiohttp_client.async_get_clientsession(oauth_session.hass))
 
         # Create a custom session that wraps the original
         self._oauth_session = CustomOAuth2Session(
@@ -74,5 +91,14 @@ class LightwaveSmartAuth(lightwave_smart.LWAuth):
 
     async def async_get_access_token(self) -> str:
         """Return a valid access token for Lightwave Smart API."""
+        previous = self._oauth_session.token.get("access_token")
         await self._oauth_session.async_ensure_token_valid()
-        return cast(str, self._oauth_session.token["access_token"])
+        token = self._oauth_session.token
+
+        # the OAuth2 session refreshes the token and stores it in the config entry, the callback only counts it
+        if self._token_refresh_callback and previous is not None and token["access_token"] != previous:
+            try:
+                self._token_refresh_callback(token["access_token"], token.get("refresh_token"), token.get("expires_at"))
+            except Exception as e:
+                _LOGGER.error(f"async_get_access_token: Error calling token refresh callback (continuing) - {e}")
+        return cast(str, token["access_token"])
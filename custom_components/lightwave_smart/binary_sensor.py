@@ -14,8 +14,10 @@ from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers import entity_registry as er
 from .utils import (
     make_entity_device_info,
-    get_extra_state_attributes
+    get_extra_state_attributes,
+    is_feature_changed
 )
+from .entity import LWRF2FeaturesetEntity
 
 DEPENDENCIES = ['lightwave_smart']
 _LOGGER = logging.getLogger(__name__)
@@ -61,7 +63,7 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_ENTITIES].extend(sensors)
     async_add_entities(sensors)
 
-class LWRF2BinarySensor(BinarySensorEntity):
+class LWRF2BinarySensor(LWRF2FeaturesetEntity, BinarySensorEntity):
     """Representation of a LightwaveRF window sensor."""
 
     _attr_has_entity_name = True
@@ -69,17 +71,12 @@ class LWRF2BinarySensor(BinarySensorEntity):
 
     def __init__(self, name, featureset_id, link, description, homekit):
         _LOGGER.debug("Adding binary sensor %s - %s - %s ", name, description.key, featureset_id)
-        self._featureset_id = featureset_id
-        self._lwlink = link
+        self._lw_context = link.get_featureset_context(featureset_id)
 
         self.entity_description = description
         
-        self._featureset = self._lwlink.featuresets[self._featureset_id]
-        self._device = self._featureset.device
-
         self._homekit = homekit
 
-        self._gen2 = self._featureset.is_gen2()
         self._attr_assumed_state = not self._gen2
 
         self._attr_name = self.entity_description.name
@@ -87,10 +84,6 @@ class LWRF2BinarySensor(BinarySensorEntity):
         self._attr_unique_id = f"{self._featureset_id}_{self.entity_description.key}"
         
         self._attr_device_info = make_entity_device_info(self, name)
-        
-        self._state = \
-            self._featureset.features[self.entity_description.key].state
-
 
     async def async_added_to_hass(self):
         """Subscribe to events."""
@@ -109,17 +102,13 @@ class LWRF2BinarySensor(BinarySensorEntity):
     @callback
     def async_update_callback(self, **kwargs):
         """Update the component's state."""
-        self.async_schedule_update_ha_state(True)
-
-    async def async_update(self):
-        """Update state"""
-        self._state = \
-            self._featureset.features[self.entity_description.key].state
+        if is_feature_changed(kwargs):
+            self.async_schedule_update_ha_state()
 
     @property
     def is_on(self):
         """Lightwave switch is on state."""
-        return self._state
+        return self._featureset.features[self.entity_description.key].state
 
     @property
     def extra_state_attributes(self):
@@ -0,0 +1,127 @@
+"""Capture of the link's incoming traffic, for replay against the integration offline (benchmarks/replay.py)."""
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_VERSION = 1
+MAX_CAPTURE_EVENTS = 500000
+
+
+class Pseudonymizer:
+    """Replace Lightwave ids with short stand-ins, consistently within a capture.
+
+    Ids are made of '-' separated parts (structure, group, device, link), each part is replaced
+    on its own, so ids still share their structure part and the link can parse them.
+    """
+
+    def __init__(self):
+        self._parts = {}
+
+    def __call__(self, thing_id):
+        if thing_id is None:
+            return None
+        return "-".join(self._parts.setdefault(part, f"x{len(self._parts)}") for part in thing_id.split("-"))
+
+
+class LinkCapture:
+    """Records the feature events processed by the link, with the time since the capture started.
+
+    Names, serial numbers and ids are replaced. The hierarchy was read when the link connected, it
+    is recorded as the group.hierarchy / group.read payloads the link would need to rebuild it, with
+    the feature values at the start of the capture.
+    """
+
+    def __init__(self, link):
+        self._link = link
+        self._start = time.monotonic()
+        self._ids = Pseudonymizer()
+        self.events = []            # (seconds, transport, featureId, value)
+        self.dropped = 0
+        self.hierarchy = self._get_hierarchy()
+
+    def record_message(self, transport, message):
+        elapsed = round(time.monotonic() - self._start, 4)
+        for item in message["items"]:
+            payload = item.get("payload", {})
+            if "featureId" not in payload:
+                continue
+            if len(self.events) >= MAX_CAPTURE_EVENTS:
+                self.dropped += 1
+                continue
+            self.events.append((elapsed, transport, self._ids(payload["featureId"]), payload.get("value")))
+
+    def _get_hierarchy(self):
+        link = self._link
+        groups = defaultdict(lambda: {"featureSet": [], "devices": {}, "features": {}})
+
+        for featureset in link.featuresets.values():
+            group = groups[link.get_structure_id(featureset.featureset_id)]
+            features = list(featureset.features.values())
+            primary = featureset.features.get(featureset.primary_feature_type)
+            group["featureSet"].append({
+                "groupId": self._ids(featureset.featureset_id),
+                "deviceId": self._ids(featureset.device.device_id),
+                "name": f"Featureset {len(group['featureSet']) + 1}",
+                "features": [self._ids(feature.id) for feature in features],
+                "primaryFeatureId": self._ids(primary.id) if primary else None,
+            })
+
+            device = featureset.device
+            group["devices"][self._ids(device.device_id)] = {
+                key: value for key, value in {
+                    "deviceId": self._ids(device.device_id),
+                    "featureIds": [self._ids(feature_id) for feature_id in device.featureIds],
+                    "productCode": device.product_code,
+                    "virtualProductCode": device.virtual_product_code,
+                    "manufacturerCode": device.manufacturer_code,
+                    "firmwareVersion": device.firmware_version,
+                }.items() if value is not None
+            }
+
+            for feature in features:
+                group["features"][self._ids(feature.id)] = {
+                    "featureId": self._ids(feature.id),
+                    "attributes": {
+                        key: value for key, value in feature.lw_feature.get("attributes", {}).items() if key != "name"
+                    },
+                }
+
+        hierarchy = []
+        for structure_id, group in groups.items():
+            for featureset in group["featureSet"]:
+                if featureset["primaryFeatureId"] is None:
+                    del featureset["primaryFeatureId"]
+            linkplus_featureset_id = link.structures.get(structure_id, {}).get("linkPlus_featureset_id")
+            hierarchy.append({
+                "groupId": self._ids(structure_id),
+                "hierarchy": {
+                    "featureSet": group["featureSet"],
+                    "link": [{"featureSets": [self._ids(linkplus_featureset_id)] if linkplus_featureset_id else []}],
+                    "root": [{"groupId": self._ids(structure_id), "name": f"Structure {len(hierarchy) + 1}"}],
+                },
+                "read": {"devices": group["devices"], "features": group["features"]},
+            })
+
+        values = {self._ids(feature.id): feature.state for feature in link.features.values() if feature.state is not None}
+        return {"groups": hierarchy, "values": values}
+
+    def write(self, path, seconds):
+        """Write the capture as gzipped JSON lines: a header, the hierarchy, then one line per event."""
+        with gzip.open(path, "wt", encoding="utf-8") as capture_file:
+            header = {
+                "type": "header",
+                "version": CAPTURE_VERSION,
+                "seconds": seconds,
+                "events": len(self.events),
+                "dropped": self.dropped,
+            }
+            capture_file.write(json.dumps(header) + "\n")
+            capture_file.write(json.dumps({"type": "hierarchy", **self.hierarchy}, separators=(",", ":")) + "\n")
+            for elapsed, transport, feature_id, value in self.events:
+                capture_file.write(json.dumps({"t": elapsed, "via": transport, "id": feature_id, "v": value}, separators=(",", ":")) + "\n")
+        if self.dropped:
+            _LOGGER.warning(f"LinkCapture: {self.dropped} events were not captured, the limit is {MAX_CAPTURE_EVENTS}")
@@ -1,5 +1,5 @@
 import logging
-from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, DOMAIN
+from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, LIGHTWAVE_SCHEDULER, DOMAIN
 from homeassistant.const import ATTR_TEMPERATURE, STATE_OFF
 from homeassistant.components.climate import (
     ClimateEntity, 
@@ -37,8 +37,10 @@ except ImportError:
 from homeassistant.core import callback
 from .utils import (
     make_entity_device_info,
-    get_extra_state_attributes
+    get_extra_state_attributes,
+    is_feature_changed
 )
+from .entity import LWRF2FeaturesetEntity
 
 DEPENDENCIES = ['lightwave_smart']
 _LOGGER = logging.getLogger(__name__)
@@ -56,10 +58,11 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 
     climates = []
     link = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_LINK2]
+    scheduler = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_SCHEDULER]
 
     for featureset_id, name in link.get_climates():
         try:
-            climates.append(LWRF2Climate(name, featureset_id, link))
+            climates.append(LWRF2Climate(name, featureset_id, link, scheduler))
         except Exception as e: _LOGGER.exception("Could not add LWRF2Climate")
 
 
@@ -67,23 +70,19 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     async_add_entities(climates)
 
 
-class LWRF2Climate(ClimateEntity):
+class LWRF2Climate(LWRF2FeaturesetEntity, ClimateEntity):
     """Representation of a LightwaveRF thermostat."""
 
     _attr_has_entity_name = True
     _attr_should_poll = False
 
-    def __init__(self, name, featureset_id, link):
+    def __init__(self, name, featureset_id, link, scheduler):
         _LOGGER.debug("Adding climate %s - %s ", name, featureset_id)
-        self._featureset_id = featureset_id
-        self._lwlink = link
+        self._lw_context = link.get_featureset_context(featureset_id)
+        self._scheduler = scheduler
 
         self.entity_description = CLIMATE
 
-        self._featureset = self._lwlink.featuresets[self._featureset_id]
-        self._device = self._featureset.device
-
-        self._gen2 = self._featureset.is_gen2()
         self._attr_assumed_state = not self._gen2
 
         self._attr_unique_id = f"{self._featureset_id}_{self.entity_description.key}"
@@ -157,7 +156,8 @@ class LWRF2Climate(ClimateEntity):
     @callback
     def async_update_callback(self, **kwargs):
         """Update the component's state."""
-        self.async_schedule_update_ha_state(True)
+        if is_feature_changed(kwargs):
+            self.async_schedule_update_ha_state(True)
 
     @property
     def supported_features(self):
@@ -225,21 +225,21 @@ class LWRF2Climate(ClimateEntity):
             self._target_temperature = kwargs[ATTR_TEMPERATURE]
             self._last_tt = self._target_temperature
 
-        await self._lwlink.async_set_temperature_by_featureset_id(
+        await self._scheduler.async_run_entity_command(self, self._lwlink.async_set_temperature_by_featureset_id,
             self._featureset_id, self._target_temperature)
 
     async def async_set_humidity(self, humidity):
         feature_id = self._featureset.features['targetHumidity'].id
-        await self._lwlink.async_write_feature(feature_id, humidity)
+        await self._scheduler.async_run_entity_command(self, self._lwlink.async_write_feature, feature_id, humidity)
 
     async def async_set_hvac_mode(self, hvac_mode):
         feature_id = self._featureset.features['heatState'].id
         _LOGGER.debug("Received mode set request: %s ", hvac_mode)
         _LOGGER.debug("Setting feature ID: %s ", feature_id)
         if hvac_mode == HVAC_MODE_OFF:
-            await self._lwlink.async_write_feature(feature_id, 0)
+            await self._scheduler.async_run_entity_command(self, self._lwlink.async_write_feature, feature_id, 0)
         else:
-            await self._lwlink.async_write_feature(feature_id, 1)
+            await self._scheduler.async_run_entity_command(self, self._lwlink.async_write_feature, feature_id, 1)
 
     async def async_update(self):
         """Update state"""
@@ -298,13 +298,13 @@ class LWRF2Climate(ClimateEntity):
         """Set preset mode."""
         if preset_mode == "Auto":
             self._target_temperature = self._last_tt
-            await self._lwlink.async_set_temperature_by_featureset_id(
+            await self._scheduler.async_run_entity_command(self, self._lwlink.async_set_temperature_by_featureset_id,
                 self._featureset_id, self._target_temperature)
         else:
             feature_id = self._featureset.features['valveLevel'].id
             _LOGGER.debug("Received preset set request: %s ", preset_mode)
             _LOGGER.debug("Setting feature ID: %s ", feature_id)
-            await self._lwlink.async_write_feature(feature_id, PRESET_NAMES[preset_mode])
+            await self._scheduler.async_run_entity_command(self, self._lwlink.async_write_feature, feature_id, PRESET_NAMES[preset_mode])
 
     @property
     def preset_modes(self):
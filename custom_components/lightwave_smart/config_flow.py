@@ -4,7 +4,7 @@ import voluptuous as vol
 from typing import Any, Mapping
 from homeassistant import config_entries
 from homeassistant.core import callback
-from homeassistant.helpers import config_validation as cv, config_entry_oauth2_flow, selector
+from homeassistant.helpers import aiohttp_client, config_validation as cv, config_entry_oauth2_flow, selector
 from homeassistant.const import (CONF_USERNAME, CONF_PASSWORD)
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.config_entries import (
@@ -19,6 +19,31 @@ from homeassistant.helpers import storage
 from .const import (
     DOMAIN, 
     CONF_HOMEKIT, 
+    CONF_ACK_TIMEOUT,
+    CONF_COMMAND_CONCURRENCY,
+    CONF_COMMAND_RATE,
+    CONF_SWEEP_INTERVAL,
+    CONF_SWEEP_BATCH,
+    CONF_KEEP_ALIVE_MODE,
+    CONF_KEEP_ALIVE_INTERVAL,
+    KEEP_ALIVE_MODES,
+    CONF_LOCAL_URL,
+    CONF_SKIP_DIAGNOSTICS,
+    DIAGNOSTIC_CATEGORIES,
+    CONF_STRUCTURES,
+    CONF_STRUCTURE_NAMES,
+    CONF_ENERGY_BACKFILL,
+    LIGHTWAVE_LINK2,
+    DEFAULT_ACK_TIMEOUT,
+    DEFAULT_COMMAND_CONCURRENCY,
+    DEFAULT_COMMAND_RATE,
+    DEFAULT_SWEEP_INTERVAL,
+    DEFAULT_SWEEP_BATCH,
+    DEFAULT_KEEP_ALIVE_MODE,
+    DEFAULT_KEEP_ALIVE_INTERVAL,
+    DEFAULT_SKIP_DIAGNOSTICS,
+    DEFAULT_STRUCTURES,
+    DEFAULT_ENERGY_BACKFILL,
     CONF_LW_AUTH_METHODS, 
     CONF_LW_AUTH_METHOD, 
     CONF_API_KEY, 
@@ -80,6 +105,21 @@ class InvalidAuth(HomeAssistantError):
     """Error to indicate there is invalid auth."""
 
 
+def get_structure_names(link, known_names, selected):
+    """Names of the account's structures by id. Structures that are not loaded are not read, their names are kept from when they were."""
+    names = dict(known_names)
+    if link is not None:
+        for structure_id in link.root_structure_ids:
+            name = link.structures.get(structure_id, {}).get("name")
+            if name:
+                names[structure_id] = name
+            else:
+                names.setdefault(structure_id, structure_id)
+    for structure_id in selected:
+        names.setdefault(structure_id, structure_id)
+    return names
+
+
 class lightwave_smartOptionsFlowHandler(config_entries.OptionsFlow):
 
     def __init__(self, config_entry):
@@ -89,9 +129,16 @@ class lightwave_smartOptionsFlowHandler(config_entries.OptionsFlow):
         return await self.async_step_user()
 
     async def async_step_user(self, user_input=None):
+        link = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id, {}).get(LIGHTWAVE_LINK2)
+        structure_names = get_structure_names(
+            link,
+            self.config_entry.options.get(CONF_STRUCTURE_NAMES, {}),
+            self.config_entry.options.get(CONF_STRUCTURES, DEFAULT_STRUCTURES),
+        )
+
         if user_input is not None:
             _LOGGER.debug("Received user input: %s ", user_input)
-            return self.async_create_entry(title="", data=user_input)
+            return self.async_create_entry(title="", data={**user_input, CONF_STRUCTURE_NAMES: structure_names})
 
 
         data = self.config_entry.data
@@ -101,7 +148,18 @@ class lightwave_smartOptionsFlowHandler(config_entries.OptionsFlow):
             _LOGGER.debug(f"Creating options form using existing options: {options}")
         else:
             options = {
-                CONF_HOMEKIT: False
+                CONF_HOMEKIT: False,
+                CONF_ACK_TIMEOUT: DEFAULT_ACK_TIMEOUT,
+                CONF_COMMAND_CONCURRENCY: DEFAULT_COMMAND_CONCURRENCY,
+                CONF_COMMAND_RATE: DEFAULT_COMMAND_RATE,
+                CONF_SWEEP_INTERVAL: DEFAULT_SWEEP_INTERVAL,
+                CONF_SWEEP_BATCH: DEFAULT_SWEEP_BATCH,
+                CONF_KEEP_ALIVE_MODE: DEFAULT_KEEP_ALIVE_MODE,
+                CONF_KEEP_ALIVE_INTERVAL: DEFAULT_KEEP_ALIVE_INTERVAL,
+                CONF_LOCAL_URL: "",
+                CONF_SKIP_DIAGNOSTICS: DEFAULT_SKIP_DIAGNOSTICS,
+                CONF_STRUCTURES: DEFAULT_STRUCTURES,
+                CONF_ENERGY_BACKFILL: DEFAULT_ENERGY_BACKFILL
             }
             _LOGGER.debug(f"Creating options form using default options: {options}")
             
@@ -109,6 +167,39 @@ class lightwave_smartOptionsFlowHandler(config_entries.OptionsFlow):
             step_id="user", 
             data_schema=vol.Schema({
                 vol.Optional(CONF_HOMEKIT, default=options.get(CONF_HOMEKIT)): bool,
+                vol.Optional(CONF_ACK_TIMEOUT, default=options.get(CONF_ACK_TIMEOUT, DEFAULT_ACK_TIMEOUT)): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+                vol.Optional(CONF_COMMAND_CONCURRENCY, default=options.get(CONF_COMMAND_CONCURRENCY, DEFAULT_COMMAND_CONCURRENCY)): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+                vol.Optional(CONF_COMMAND_RATE, default=options.get(CONF_COMMAND_RATE, DEFAULT_COMMAND_RATE)): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Optional(CONF_SWEEP_INTERVAL, default=options.get(CONF_SWEEP_INTERVAL, DEFAULT_SWEEP_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                vol.Optional(CONF_SWEEP_BATCH, default=options.get(CONF_SWEEP_BATCH, DEFAULT_SWEEP_BATCH)): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                vol.Optional(CONF_KEEP_ALIVE_MODE, default=options.get(CONF_KEEP_ALIVE_MODE, DEFAULT_KEEP_ALIVE_MODE)): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=KEEP_ALIVE_MODES,
+                        mode=selector.SelectSelectorMode.DROPDOWN,
+                        translation_key=CONF_KEEP_ALIVE_MODE,
+                    )
+                ),
+                vol.Optional(CONF_KEEP_ALIVE_INTERVAL, default=options.get(CONF_KEEP_ALIVE_INTERVAL, DEFAULT_KEEP_ALIVE_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=5, max=600)),
+                vol.Optional(CONF_LOCAL_URL, default=options.get(CONF_LOCAL_URL, "")): str,
+                vol.Optional(CONF_SKIP_DIAGNOSTICS, default=options.get(CONF_SKIP_DIAGNOSTICS, DEFAULT_SKIP_DIAGNOSTICS)): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=DIAGNOSTIC_CATEGORIES,
+                        multiple=True,
+                        mode=selector.SelectSelectorMode.LIST,
+                        translation_key=CONF_SKIP_DIAGNOSTICS,
+                    )
+                ),
+                vol.Optional(CONF_STRUCTURES, default=options.get(CONF_STRUCTURES, DEFAULT_STRUCTURES)): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=[
+                            selector.SelectOptionDict(value=structure_id, label=name)
+                            for structure_id, name in structure_names.items()
+                        ],
+                        multiple=True,
+                        mode=selector.SelectSelectorMode.LIST,
+                    )
+                ),
+                vol.Optional(CONF_ENERGY_BACKFILL, default=options.get(CONF_ENERGY_BACKFILL, DEFAULT_ENERGY_BACKFILL)): bool,
                 vol.Remove(CONF_LW_AUTH_METHOD): data.get(CONF_LW_AUTH_METHOD, "unknown")
             })
         )
@@ -432,24 +523,21 @@ class lightwave_smartFlowHandler(
         return await self.async_step_user(user_input=user_input)
 
     async def _test_connection(self, username: str, password: str) -> dict:
-        """Test the connection to Lightwave."""
-        from lightwave_smart import lightwave_smart
+        """Test the credentials by requesting tokens from Lightwave.
+        
+        The websocket and hierarchy are left to async_setup_entry, which starts with the tokens returned here.
+        """
+        from .auth import HassSessionAuth
         
-        link = None
         try:
-            link = lightwave_smart.LWLink2()
-            link.auth.set_auth_method(auth_method="password", username=username, password=password)
+            auth = HassSessionAuth(aiohttp_client.async_get_clientsession(self.hass))
+            auth.set_auth_method(auth_method="password", username=username, password=password)
             
-            connected = await link.async_activate(max_tries=3, force_keep_alive_secs=0, source="hass_test")
-            if not connected:
+            # a failed password login is logged by the library but does not raise
+            if not await auth.async_get_access_token():
                 raise InvalidAuth("Invalid credentials")
-                
-            # Test getting hierarchy
-            await link.async_get_hierarchy()
             
-            # Get tokens
-            tokens = link.auth.get_tokens()
-            return tokens            
+            return auth.get_tokens()
                 
         except Exception as e:
             _LOGGER.error("Connection test failed: %s", e)
@@ -457,10 +545,6 @@ class lightwave_smartFlowHandler(
                 raise InvalidAuth("Invalid credentials") from e
             else:
                 raise CannotConnect("Cannot connect to Lightwave service") from e
-            
-        finally:
-            if link is not None:
-                await link.async_deactivate("hass_test")
 
     @staticmethod
     @callback
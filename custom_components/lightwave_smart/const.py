@@ -1,9 +1,29 @@
 DOMAIN = 'lightwave_smart'
 CONF_FORCESEND = 'lightwave_alwayssend'
 CONF_HOMEKIT = 'lightwave_homekit'
+CONF_ACK_TIMEOUT = 'lightwave_ack_timeout'
+CONF_COMMAND_CONCURRENCY = 'lightwave_command_concurrency'
+CONF_COMMAND_RATE = 'lightwave_command_rate'
+CONF_SWEEP_INTERVAL = 'lightwave_sweep_interval'
+CONF_SWEEP_BATCH = 'lightwave_sweep_batch'
+CONF_KEEP_ALIVE_MODE = 'lightwave_keep_alive_mode'
+CONF_KEEP_ALIVE_INTERVAL = 'lightwave_keep_alive_interval'
+KEEP_ALIVE_MODES = ['fixed', 'adaptive']
+CONF_LOCAL_URL = 'lightwave_local_url'
+CONF_SKIP_DIAGNOSTICS = 'lightwave_skip_diagnostics'
+DIAGNOSTIC_CATEGORIES = ['signal', 'electrical', 'events', 'secondary_energy']
+CONF_STRUCTURES = 'lightwave_structures'
+CONF_STRUCTURE_NAMES = 'lightwave_structure_names'
+CONF_ENERGY_BACKFILL = 'lightwave_energy_backfill'
 LIGHTWAVE_LINK2 = 'lightwave_link2'
 LIGHTWAVE_ENTITIES = 'lightwave_entities'
 LIGHTWAVE_PLATFORMS = 'lightwave_platforms'
+LIGHTWAVE_COUNTERS = 'lightwave_counters'
+LIGHTWAVE_SCHEDULER = 'lightwave_scheduler'
+LIGHTWAVE_SWEEPER = 'lightwave_sweeper'
+LIGHTWAVE_RESYNC = 'lightwave_resync'
+LIGHTWAVE_WATCHDOG = 'lightwave_watchdog'
+LIGHTWAVE_BACKFILL = 'lightwave_backfill'
 SERVICE_SETLEDRGB = 'set_led_rgb'
 SERVICE_SETLOCKED = 'lock'
 SERVICE_SETUNLOCKED = 'unlock'
@@ -11,6 +31,13 @@ SERVICE_SETBRIGHTNESS = 'set_brightness'
 SERVICE_RECONNECT = 'reconnect'
 SERVICE_UPDATE = 'update_states'
 SERVICE_RESET_ENABLED_STATUS_TO_DEFAULTS = 'reset_enabled_status_to_defaults'
+SERVICE_PROFILE = 'profile'
+SERVICE_CAPTURE = 'capture'
+SERVICE_BACKFILL_ENERGY = 'backfill_energy'
+
+ATTR_CONFIG_ENTRY_ID = 'config_entry_id'
+ATTR_SECONDS = 'seconds'
+ATTR_HOURS = 'hours'
 
 CONF_LW_INSTANCE_NAME = 'instance_name'
 CONF_LW_AUTH_METHOD = 'lightwave_auth_method'
@@ -22,4 +49,19 @@ CONF_REFRESH_TOKEN = 'refresh_token'
 CONF_ACCESS_TOKEN = 'access_token'
 CONF_TOKEN_EXPIRY = 'token_expiry'
 
-CONF_LW_OAUTH_USER_INPUT = 'oauth_user_input'
\ No newline at end of file
+CONF_LW_OAUTH_USER_INPUT = 'oauth_user_input'
+
+# features with a sensor entity of their own, the other entities of the featureset only want (and show
+# in their attributes) these while that sensor is enabled
+SENSOR_FEATURES = {'power', 'energy', 'rssi', 'batteryLevel', 'voltage', 'current', 'lightLevel', 'dawnTime', 'duskTime'}
+
+DEFAULT_ACK_TIMEOUT = 10
+DEFAULT_COMMAND_CONCURRENCY = 4
+DEFAULT_COMMAND_RATE = 10
+DEFAULT_SWEEP_INTERVAL = 0
+DEFAULT_SWEEP_BATCH = 5
+DEFAULT_KEEP_ALIVE_MODE = 'fixed'
+DEFAULT_KEEP_ALIVE_INTERVAL = 15
+DEFAULT_SKIP_DIAGNOSTICS = []
+DEFAULT_STRUCTURES = []
+DEFAULT_ENERGY_BACKFILL = False
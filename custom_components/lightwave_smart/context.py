@@ -0,0 +1,18 @@
+"""State shared by the entities of a featureset."""
+
+
+class FeaturesetContext:
+    """The link, featureset, device and generation of a featureset, held once for all its entities.
+
+    A featureset has an entity per feature type it supports (a socket has a switch, power and energy
+    sensors, LEDs, a lock...), which look these up through the context instead of each holding them.
+    """
+
+    __slots__ = ("link", "featureset_id", "featureset", "device", "gen2")
+
+    def __init__(self, link, featureset_id):
+        self.link = link
+        self.featureset_id = featureset_id
+        self.featureset = link.featuresets[featureset_id]
+        self.device = self.featureset.device
+        self.gen2 = self.featureset.is_gen2()
@@ -0,0 +1,78 @@
+"""Diagnostics support for Lightwave Smart."""
+from collections import Counter
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, CONF_TOKEN
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN, LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, LIGHTWAVE_COUNTERS, LIGHTWAVE_SCHEDULER, LIGHTWAVE_WATCHDOG,
+    CONF_API_KEY, CONF_ACCESS_TOKEN, CONF_REFRESH_TOKEN, CONF_LOCAL_URL, CONF_STRUCTURE_NAMES
+)
+
+TO_REDACT = {
+    CONF_PASSWORD, CONF_USERNAME, CONF_TOKEN, CONF_API_KEY, CONF_ACCESS_TOKEN, CONF_REFRESH_TOKEN, CONF_LOCAL_URL,
+    CONF_STRUCTURE_NAMES,
+}
+
+
+def get_pruning_stats(link):
+    """How many features and events are left out for having no enabled entity that wants them."""
+    wanted = link.get_wanted_features()
+    return {
+        "active": wanted is not None,
+        "pruned_features": len(link.features) - len(wanted) if wanted is not None else 0,
+        "dropped_events": link.stats.dropped_events["no_enabled_entity"],
+        "dispatched_events": sum(link.stats.feature_type_events.values()),
+    }
+
+
+def get_hierarchy_stats(link):
+    """Sizes of the hierarchy, no ids or names."""
+    wanted = link.get_wanted_features()
+    return {
+        "structures": len(link.structures),
+        "devices": len(link.devices),
+        "featuresets": len(link.featuresets),
+        "features": len(link.features),
+        "readable_features": sum(1 for feature in link.features.values() if feature.can_read),
+        "wanted_features": len(wanted) if wanted is not None else "all",
+        "products": dict(Counter(device.product_code for device in link.devices.values()).most_common()),
+        "feature_types": dict(Counter(feature.name for feature in link.features.values()).most_common()),
+    }
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, config_entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    link = entry_data[LIGHTWAVE_LINK2]
+    scheduler = entry_data[LIGHTWAVE_SCHEDULER]
+    watchdog = entry_data[LIGHTWAVE_WATCHDOG]
+
+    return {
+        "config_entry": {
+            "data": async_redact_data(dict(config_entry.data), TO_REDACT),
+            "options": async_redact_data(dict(config_entry.options), TO_REDACT),
+        },
+        "hierarchy": get_hierarchy_stats(link),
+        "pruning": get_pruning_stats(link),
+        "entities": len(entry_data[LIGHTWAVE_ENTITIES]),
+        "counters": dict(entry_data[LIGHTWAVE_COUNTERS]),
+        "command_queue": {
+            "queue_depth": scheduler.queue_depth,
+            "running": scheduler.running,
+        },
+        "connection": {
+            "connected_since": watchdog.connected_since,
+            "latency_ms": watchdog.latency,
+            "keep_alive_interval": watchdog.keep_alive.interval,
+            "reconnects": [
+                {"time": when, "reason": reason, "attempts": attempts}
+                for when, reason, attempts in watchdog.reconnects
+            ],
+            "transport_latency_ms": dict(link.transport_latency),
+            "transport_writes": dict(link.transport_writes),
+        },
+        "performance": link.stats.as_dict(),
+    }
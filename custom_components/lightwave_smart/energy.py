@@ -0,0 +1,170 @@
+"""Backfill of the hourly long-term statistics of energy sensors, for hours that were not recorded.
+
+Lightwave has no history of energy readings, only each device's cumulative energy counter. When
+Home Assistant was not running, the recorder has no statistics for those hours and the energy
+dashboard puts the whole difference in the first hour recorded afterwards. The backfill imports
+statistics for the missing hours, interpolating the cumulative energy linearly between the
+recorded hours either side of a gap, or between the last recorded hour and the device's counter.
+"""
+import logging
+from datetime import datetime
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import async_import_statistics, get_metadata, statistics_during_period
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_conversion import EnergyConverter
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+BACKFILL_BATCH = 25         # sensors whose statistics are read per recorder job
+IMPORT_CHUNK = 500          # statistics rows per import
+DEFAULT_BACKFILL_HOURS = 168
+
+
+def get_timestamp(value):
+    """Statistics rows have float timestamps, datetimes before Home Assistant 2023.3."""
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+def interpolate_gap(first, last):
+    """Rows for the missing hours between two (start, state, sum) points, where the hour of last may be incomplete.
+
+    state and sum are the values at the end of each hour, so points are placed at start + 1 hour.
+    """
+    first_end, last_end = first[0] + HOUR, last[0] + HOUR
+    rows = []
+    start = first[0] + HOUR
+    while start < last[0]:
+        fraction = (start + HOUR - first_end) / (last_end - first_end)
+        rows.append({
+            "start": dt_util.utc_from_timestamp(start),
+            "state": first[1] + (last[1] - first[1]) * fraction,
+            "sum": first[2] + (last[2] - first[2]) * fraction,
+        })
+        start += HOUR
+    return rows
+
+
+def get_backfill_rows(rows, current_value, now):
+    """The rows to import for the gaps between the recorded rows, and from the last one until the hour before now.
+
+    rows are the recorded hours as (start, state, sum), current_value is the device's counter or None.
+    """
+    backfill = []
+    for first, last in zip(rows, rows[1:]):
+        if last[0] - first[0] > HOUR:
+            backfill += interpolate_gap(first, last)
+
+    last = rows[-1]
+    hour = now - now % HOUR
+    if current_value is not None and last[1] is not None and last[0] < hour - HOUR:
+        # the counter restarts from 0 if the device is reset
+        added = current_value - last[1] if current_value >= last[1] else current_value
+        # the end point at now, as if its hour ended then
+        backfill += interpolate_gap(last, (now - HOUR, current_value, last[2] + added))
+    return backfill
+
+
+class EnergyBackfill:
+    """Imports interpolated statistics for the energy sensors of a config entry, in batches of sensors.
+
+    The last hour backfilled is stored per sensor, a run resumes from there (or at most hours back).
+    """
+
+    def __init__(self, hass, config_entry, link):
+        self._hass = hass
+        self._link = link
+        self._store = Store(hass, 1, f"{DOMAIN}_{config_entry.entry_id}_energy_backfill")
+        self._resume = None     # statistic_id -> start timestamp of the last hour backfilled
+        self._running = False
+
+    def _get_energy_sensors(self, featureset_ids=None):
+        """{entity_id: featureset} of the energy sensors in the entity registry."""
+        registry = er.async_get(self._hass)
+        sensors = {}
+        for featureset_id, featureset in self._link.featuresets.items():
+            if featureset_ids is not None and featureset_id not in featureset_ids:
+                continue
+            if not featureset.has_feature("energy"):
+                continue
+            entity_id = registry.async_get_entity_id("sensor", DOMAIN, f"{featureset_id}_energy")
+            if entity_id is not None:
+                sensors[entity_id] = featureset
+        return sensors
+
+    async def async_run(self, hours=DEFAULT_BACKFILL_HOURS, featureset_ids=None):
+        """Backfill the energy sensors (of the given featuresets), returns the number of rows imported."""
+        if "recorder" not in self._hass.config.components:
+            _LOGGER.warning("EnergyBackfill: The recorder is not loaded, nothing to backfill")
+            return 0
+        if self._running:
+            _LOGGER.warning("EnergyBackfill: Already running")
+            return 0
+
+        self._running = True
+        try:
+            if self._resume is None:
+                self._resume = await self._store.async_load() or {}
+
+            sensors = self._get_energy_sensors(featureset_ids)
+            entity_ids = list(sensors)
+            imported = 0
+            for index in range(0, len(entity_ids), BACKFILL_BATCH):
+                batch = {entity_id: sensors[entity_id] for entity_id in entity_ids[index:index + BACKFILL_BATCH]}
+                imported += await self._async_backfill_batch(batch, hours)
+            await self._store.async_save(self._resume)
+
+            _LOGGER.info(f"EnergyBackfill: Imported {imported} hours of statistics for {len(sensors)} energy sensors")
+            return imported
+        finally:
+            self._running = False
+
+    async def _async_backfill_batch(self, sensors, hours):
+        now = dt_util.utcnow().timestamp()
+        earliest = now - hours * HOUR
+        start = min(max(self._resume.get(entity_id, earliest), earliest) for entity_id in sensors)
+
+        metadata, statistics = await get_instance(self._hass).async_add_executor_job(
+            self._read_statistics, set(sensors), dt_util.utc_from_timestamp(start)
+        )
+
+        imported = 0
+        for entity_id, featureset in sensors.items():
+            if entity_id not in metadata:
+                continue        # not recorded yet, there is nothing to interpolate from
+            resume = max(self._resume.get(entity_id, earliest), earliest)
+            rows = [
+                (get_timestamp(row["start"]), row.get("state"), row.get("sum"))
+                for row in statistics.get(entity_id, [])
+                if get_timestamp(row["start"]) >= resume and row.get("sum") is not None
+            ]
+            if not rows:
+                continue
+
+            # statistics are kept in the sensor's unit, which may have been changed from Wh
+            current_value = featureset.features["energy"].state
+            unit = metadata[entity_id][1].get("unit_of_measurement")
+            if current_value is not None and unit and unit != "Wh":
+                current_value = EnergyConverter.convert(current_value, "Wh", unit)
+
+            backfill = get_backfill_rows(rows, current_value, now)
+            for index in range(0, len(backfill), IMPORT_CHUNK):
+                async_import_statistics(self._hass, metadata[entity_id][1], backfill[index:index + IMPORT_CHUNK])
+            imported += len(backfill)
+
+            last = max([rows[-1][0]] + [row["start"].timestamp() for row in backfill])
+            self._resume[entity_id] = last
+            if backfill:
+                _LOGGER.debug(f"EnergyBackfill: {entity_id} - imported {len(backfill)} hours up to {dt_util.utc_from_timestamp(last)}")
+        return imported
+
+    def _read_statistics(self, statistic_ids, start):
+        """Recorder thread: the statistics metadata and the hourly states and sums since start."""
+        metadata = get_metadata(self._hass, statistic_ids=statistic_ids)
+        statistics = statistics_during_period(self._hass, start, None, statistic_ids, "hour", None, {"state", "sum"})
+        return metadata, statistics
@@ -0,0 +1,93 @@
+"""Base class for Lightwave entities."""
+import time
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import Entity
+
+from .const import SENSOR_FEATURES
+
+
+class LWRF2Entity(Entity):
+    """Counts the state writes of the entity in the link stats (see diagnostics), timing them while profiling.
+
+    An update scheduled while the link dispatches a feature event is timed from the event's arrival
+    until the state is written.
+    """
+
+    _event_received = None
+
+    @callback
+    def async_schedule_update_ha_state(self, force_refresh=False):
+        received = self._lwlink.stats.event_received
+        if received is not None and self._event_received is None:
+            self._event_received = received
+        super().async_schedule_update_ha_state(force_refresh)
+
+    @callback
+    def _async_write_ha_state(self):
+        stats = self._lwlink.stats
+        stats.record_state_write(self.entity_id)
+
+        profiler = stats.profiler
+        if profiler is None:
+            super()._async_write_ha_state()
+        else:
+            start = time.perf_counter()
+            try:
+                super()._async_write_ha_state()
+            finally:
+                key = self.entity_description.key if hasattr(self, "entity_description") else None
+                profiler.record(("state_write", type(self).__name__, key), time.perf_counter() - start)
+
+        if self._event_received is not None:
+            stats.record_event_latency(time.monotonic() - self._event_received)
+            self._event_received = None
+
+
+class LWRF2FeaturesetEntity(LWRF2Entity):
+    """Entity of a featureset, the link, featureset and device are looked up through the shared context.
+
+    While added to Home Assistant the entity's wanted features are registered with the link, which
+    drops events of features that no added entity wants (see LightwaveSmartLink.get_wanted_features).
+    """
+
+    _lw_context = None
+    _lw_wanted = ()
+    _wants_all_events = False
+
+    def get_wanted_feature_names(self):
+        """The features the entity needs the events of: those of its state and attributes.
+
+        The attributes leave out the features with a sensor of their own (SENSOR_FEATURES), unless
+        that sensor wants them, so e.g. the RSSI of every device is not dispatched for its light.
+        """
+        return {name for name in self._featureset.features if name not in SENSOR_FEATURES}
+
+    async def async_internal_added_to_hass(self):
+        await super().async_internal_added_to_hass()
+        self._lw_wanted = self.get_wanted_feature_names()
+        self._lwlink.add_entity_featureset(self._featureset_id, self._lw_wanted, self._wants_all_events)
+
+    async def async_internal_will_remove_from_hass(self):
+        await super().async_internal_will_remove_from_hass()
+        self._lwlink.remove_entity_featureset(self._featureset_id, self._lw_wanted, self._wants_all_events)
+
+    @property
+    def _lwlink(self):
+        return self._lw_context.link
+
+    @property
+    def _featureset_id(self):
+        return self._lw_context.featureset_id
+
+    @property
+    def _featureset(self):
+        return self._lw_context.featureset
+
+    @property
+    def _device(self):
+        return self._lw_context.device
+
+    @property
+    def _gen2(self):
+        return self._lw_context.gen2
@@ -1,5 +1,4 @@
 import logging
-import traceback
 from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, SERVICE_SETBRIGHTNESS, CONF_HOMEKIT, DOMAIN
 from homeassistant.components.event import (
     EventDeviceClass,
@@ -15,9 +14,12 @@ from .utils import (
     make_entity_device_info,
     get_extra_state_attributes
 )
+from .entity import LWRF2FeaturesetEntity
+from .trace import get_tracer
 
 DEPENDENCIES = ['lightwave_smart']
 _LOGGER = logging.getLogger(__name__)
+_TRACE = get_tracer(_LOGGER, "events")
 
 ATTRIBUTES = [ None, "Up", "Down" ]
 TYPES = [ "Short", "Long", "Long-Release" ]
@@ -67,24 +69,19 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
     async_add_entities(uibuttons)
 
 
-class LWRF2UIButton(EventEntity):
+class LWRF2UIButton(LWRF2FeaturesetEntity, EventEntity):
     """Representation of a Lightwave uibutton."""
 
     _attr_should_poll = False
 
     def __init__(self, name, featureset_id, link, homekit, entity_description):
         _LOGGER.debug("Adding uibutton: %s - %s ", name, featureset_id)
-        self._featureset_id = featureset_id
-        self._lwlink = link
+        self._lw_context = link.get_featureset_context(featureset_id)
 
         self.entity_description = entity_description
 
-        self._featureset = self._lwlink.featuresets[self._featureset_id]
-        self._device = self._featureset.device
-
         self._homekit = homekit
 
-        self._gen2 = self._featureset.is_gen2()
         self._attr_assumed_state = not self._gen2
 
         self._attr_unique_id = f"{self._featureset_id}_{self.entity_description.key}"
@@ -111,7 +108,7 @@ class LWRF2UIButton(EventEntity):
     def async_update_callback(self, **kwargs):
         """Update the component's state."""
         try:
-            _LOGGER.debug(f"async_update_callback - Button event: {self.entity_id} - {kwargs} - {self.entity_description.key}")
+            _TRACE.debug("async_update_callback - Button event: %s - %s - %s", self.entity_id, kwargs, self.entity_description.key)
             
             if kwargs["feature"] == self.entity_description.key:
                 feature = self._lwlink.get_feature_by_featureid(kwargs["feature_id"])
@@ -121,7 +118,7 @@ class LWRF2UIButton(EventEntity):
                     self.async_schedule_update_ha_state(True)
                 
         except Exception as e: 
-            _LOGGER.warning(f"async_update_callback - error - entity: {self.entity_id} - {e} - kwargs: {kwargs} - error stack: {traceback.format_exc()}")
+            _TRACE.report("async_update_callback - error - entity: %s - %s - kwargs: %s", self.entity_id, e, kwargs)
             pass
         
         
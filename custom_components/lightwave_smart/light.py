@@ -1,5 +1,6 @@
 import logging
-from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, SERVICE_SETBRIGHTNESS, CONF_HOMEKIT, DOMAIN
+from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, LIGHTWAVE_COUNTERS, LIGHTWAVE_SCHEDULER, SERVICE_SETBRIGHTNESS, CONF_HOMEKIT, \
+    CONF_ACK_TIMEOUT, DEFAULT_ACK_TIMEOUT, DOMAIN
 from homeassistant.components.light import (
     LightEntity,
     LightEntityDescription,
@@ -10,8 +11,11 @@ from homeassistant.helpers import entity_platform, entity_registry as er
 from homeassistant.helpers.entity import EntityCategory
 from .utils import (
     make_entity_device_info,
-    get_extra_state_attributes
+    get_extra_state_attributes,
+    is_feature_changed
 )
+from .entity import LWRF2FeaturesetEntity
+from .pending import PendingWriteTracker
 import voluptuous as vol
 
 
@@ -46,9 +50,12 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     link = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_LINK2]
 
     homekit = config_entry.options.get(CONF_HOMEKIT, False)
+    ack_timeout = config_entry.options.get(CONF_ACK_TIMEOUT, DEFAULT_ACK_TIMEOUT)
+    counters = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_COUNTERS]
+    scheduler = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_SCHEDULER]
     for featureset_id, name in link.get_lights():
         try:
-            lights.append(LWRF2Light(name, featureset_id, link, homekit))
+            lights.append(LWRF2Light(name, featureset_id, link, homekit, ack_timeout, counters, scheduler))
         except Exception as e: _LOGGER.exception("Could not add LWRF2Light")
 
 
@@ -62,22 +69,22 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                 
             try:
                 if channel_input_mapped is not None and channel_input_mapped == False:
-                    lights.append(LWRF2LED(name, featureset_id, link, LED, 'uiIndicator'))
+                    lights.append(LWRF2LED(name, featureset_id, link, scheduler, LED, 'uiIndicator'))
                 else:
-                    lights.append(LWRF2LED(name, featureset_id, link, OFF_LED))
+                    lights.append(LWRF2LED(name, featureset_id, link, scheduler, OFF_LED))
                     
             except Exception as e: _LOGGER.exception("Could not add LWRF2LED")
 
     for featureset_id, name in link.get_sockets():
         if link.featuresets[featureset_id].has_led():
             try:
-                lights.append(LWRF2LED(name, featureset_id, link, OFF_LED))
+                lights.append(LWRF2LED(name, featureset_id, link, scheduler, OFF_LED))
             except Exception as e: _LOGGER.exception("Could not add LWRF2LED")
 
     for featureset_id, name in link.get_hubs():
         if link.featuresets[featureset_id].has_led():
             try:
-                lights.append(LWRF2LED(name, featureset_id, link, OFF_LED))
+                lights.append(LWRF2LED(name, featureset_id, link, scheduler, OFF_LED))
             except Exception as e: _LOGGER.exception("Could not add LWRF2LED")
             
 
@@ -86,7 +93,7 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         
         brightness = int(round(call.data.get("brightness") / 255 * 100))
         feature_id = light._featureset.features['dimLevel'].id
-        await link.async_write_feature(feature_id, brightness)
+        await scheduler.async_run_entity_command(light, link.async_write_feature, feature_id, brightness)
 
     platform = entity_platform.async_get_current_platform()
     platform.async_register_entity_service(
@@ -101,37 +108,29 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     async_add_entities(lights)
 
 
-class LWRF2Light(LightEntity):
+class LWRF2Light(LWRF2FeaturesetEntity, LightEntity):
     """Representation of a LightwaveRF light."""
 
     _attr_should_poll = False
 
-    def __init__(self, name, featureset_id, link, homekit):
+    def __init__(self, name, featureset_id, link, homekit, ack_timeout, counters, scheduler):
         _LOGGER.debug("Adding light: %s - %s ", name, featureset_id)
-        self._featureset_id = featureset_id
-        self._lwlink = link
+        self._lw_context = link.get_featureset_context(featureset_id)
+        self._scheduler = scheduler
 
         self.entity_description = LIGHT
         
-        self._featureset = self._lwlink.featuresets[self._featureset_id]
-        self._device = self._featureset.device
-
         self._homekit = homekit
 
-        self._gen2 = self._featureset.is_gen2()
         self._attr_assumed_state = not self._gen2
 
         self._attr_unique_id = f"{self._featureset_id}_{self.entity_description.key}"
         
         self._attr_device_info = make_entity_device_info(self, name)
 
-        self._state = \
-            self._featureset.features["switch"].state
-        
-        dimLevel = self._featureset.features["dimLevel"].state
-        self._brightness = int(round(dimLevel / 100 * 255)) if dimLevel is not None else None
-        
         self._has_led = self._featureset.has_led()
+
+        self._pending = PendingWriteTracker(self, ack_timeout, counters)
         
 
     async def async_added_to_hass(self):
@@ -148,16 +147,20 @@ class LWRF2Light(LightEntity):
             if entity_entry.hidden_by == er.RegistryEntryHider.INTEGRATION:
                 registry.async_update_entity(self.entity_id, hidden_by=None)
 
-    #TODO add async_will_remove_from_hass() to clean up
+    async def async_will_remove_from_hass(self):
+        """Cancel any pending write timers."""
+        self._pending.clear_all()
 
     @callback
     def async_update_callback(self, **kwargs):
         """Update the component's state."""
+        confirmed = self._pending.confirm(kwargs["feature"], kwargs["new_value"])
         if kwargs["feature"] == "uiButtonPair":
             _LOGGER.debug("Button (light) press event: %s %s", self.entity_id, kwargs["new_value"])
             self.hass.bus.fire("lightwave_smart.click",{"entity_id": self.entity_id, "code": kwargs["new_value"]},
         )
-        self.async_schedule_update_ha_state(True)
+        if confirmed or is_feature_changed(kwargs):
+            self.async_schedule_update_ha_state()
 
     @property
     def supported_color_modes(self):
@@ -169,48 +172,39 @@ class LWRF2Light(LightEntity):
         """Flag supported features."""
         return ColorMode.BRIGHTNESS
 
-    async def async_update(self):
-        """Update state"""
-        self._state = \
-            self._featureset.features["switch"].state
-        dimLevel = self._featureset.features["dimLevel"].state
-        self._brightness = int(round(dimLevel / 100 * 255)) if dimLevel is not None else None
-
     @property
     def brightness(self):
         """Return the brightness of the group lights."""
-        return self._brightness
+        dimLevel = self._pending.get("dimLevel", self._featureset.features["dimLevel"].state)
+        return int(round(dimLevel / 100 * 255)) if dimLevel is not None else None
 
     @property
     def is_on(self):
         """Lightwave switch is on state."""
-        return self._state
+        return self._pending.get("switch", self._featureset.features["switch"].state)
 
     async def async_turn_on(self, **kwargs):
         """Turn the Lightwave light on."""
         _LOGGER.debug("HA light.turn_on received, kwargs: %s", kwargs)
 
         if ATTR_BRIGHTNESS in kwargs:
-            _LOGGER.debug(f"Changing brightness from {self._brightness} to {kwargs[ATTR_BRIGHTNESS]} ({int(kwargs[ATTR_BRIGHTNESS] / 255 * 100)}%)")
-            self._brightness = kwargs[ATTR_BRIGHTNESS]
-            await self._lwlink.async_set_brightness_by_featureset_id(
-                self._featureset_id, int(round(self._brightness / 255 * 100)))
-
-        self._state = True
-        await self._lwlink.async_turn_on_by_featureset_id(self._featureset_id)
+            _LOGGER.debug("Changing brightness from %s to %s (%s%%)", self.brightness, kwargs[ATTR_BRIGHTNESS], int(kwargs[ATTR_BRIGHTNESS] / 255 * 100))
+            level = int(round(kwargs[ATTR_BRIGHTNESS] / 255 * 100))
+            await self._pending.async_write("dimLevel", level,
+                self._scheduler.async_run_entity_command(self, self._lwlink.async_set_brightness_by_featureset_id, self._featureset_id, level))
 
-        self.async_schedule_update_ha_state()
+        await self._pending.async_write("switch", 1,
+            self._scheduler.async_run_entity_command(self, self._lwlink.async_turn_on_by_featureset_id, self._featureset_id))
 
     async def async_turn_off(self, **kwargs):
         """Turn the Lightwave light off."""
         _LOGGER.debug("HA light.turn_off received, kwargs: %s", kwargs)
 
-        self._state = False
-        await self._lwlink.async_turn_off_by_featureset_id(self._featureset_id)
-        self.async_schedule_update_ha_state()
+        await self._pending.async_write("switch", 0,
+            self._scheduler.async_run_entity_command(self, self._lwlink.async_turn_off_by_featureset_id, self._featureset_id))
 
     async def async_set_rgb(self, led_rgb):
-        await self._lwlink.async_set_led_rgb_by_featureset_id(self._featureset_id, led_rgb)
+        await self._scheduler.async_run_entity_command(self, self._lwlink.async_set_led_rgb_by_featureset_id, self._featureset_id, led_rgb)
 
     @property
     def extra_state_attributes(self):
@@ -218,23 +212,19 @@ class LWRF2Light(LightEntity):
         return get_extra_state_attributes(self)
 
 
-class LWRF2LED(LightEntity):
+class LWRF2LED(LWRF2FeaturesetEntity, LightEntity):
     """Representation of a LightwaveRF LED."""
 
     # _attr_has_entity_name = True
     _attr_should_poll = False
 
-    def __init__(self, name, featureset_id, link, description, feature_type='rgbColor'):
+    def __init__(self, name, featureset_id, link, scheduler, description, feature_type='rgbColor'):
         _LOGGER.debug("Adding LED (%s): %s - %s ", description.key, name, featureset_id)
-        self._featureset_id = featureset_id
-        self._lwlink = link
+        self._lw_context = link.get_featureset_context(featureset_id)
+        self._scheduler = scheduler
 
         self.entity_description = description
         
-        self._featureset = self._lwlink.featuresets[self._featureset_id]
-        self._device = self._featureset.device
-
-        self._gen2 = self._featureset.is_gen2()
         self._attr_assumed_state = not self._gen2
 
         self._attr_unique_id = f"{self._featureset_id}_{self.entity_description.key}"
@@ -273,7 +263,8 @@ class LWRF2LED(LightEntity):
     def async_update_callback(self, **kwargs):
         """Update the component's state."""
         _LOGGER.debug("async_update_callback - for %s - %s ", self._featureset_id, kwargs)
-        self.async_schedule_update_ha_state(True)
+        if is_feature_changed(kwargs):
+            self.async_schedule_update_ha_state(True)
 
     @property
     def supported_color_modes(self):
@@ -333,7 +324,7 @@ class LWRF2LED(LightEntity):
         b = int(self._b * self._brightness /255)
         rgb = r * 65536 + g * 256 + b
         
-        await self._lwlink.async_set_led_rgb_by_featureset_id(self._featureset_id, rgb, self.feature_type)
+        await self._scheduler.async_run_entity_command(self, self._lwlink.async_set_led_rgb_by_featureset_id, self._featureset_id, rgb, self.feature_type)
 
         self.async_schedule_update_ha_state()
 
@@ -341,7 +332,7 @@ class LWRF2LED(LightEntity):
         """Turn the Lightwave LED off."""
         _LOGGER.debug("HA led.turn_off received, kwargs: %s", kwargs)
         self._state = False
-        await self._lwlink.async_set_led_rgb_by_featureset_id(self._featureset_id, 0, self.feature_type)
+        await self._scheduler.async_run_entity_command(self, self._lwlink.async_set_led_rgb_by_featureset_id, self._featureset_id, 0, self.feature_type)
 
         self.async_schedule_update_ha_state()
 
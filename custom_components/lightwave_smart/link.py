@@ -0,0 +1,402 @@
+"""Lightwave Smart link using Home Assistant's shared aiohttp session."""
+import asyncio
+import datetime
+import logging
+import time
+from collections import Counter
+
+import aiohttp
+from lightwave_smart import lightwave_smart
+from lightwave_smart.message import LW_WebsocketMessage
+from lightwave_smart.websocket import LWWebsocket, TRANS_SERVER
+
+from .auth import HassSessionAuth
+from .context import FeaturesetContext
+from .refresh import async_read_featuresets, get_hierarchy_fingerprint
+from .stats import LinkStats
+from .trace import get_tracer
+
+_LOGGER = logging.getLogger(__name__)
+_TRACE = get_tracer(_LOGGER, "events")
+
+LOCAL_WRITE_TIMEOUT = 2         # seconds before a local write is abandoned and sent via the cloud
+LOCAL_RETRY_AFTER = 60          # seconds before a failed local transport is used again
+LATENCY_SMOOTHING = 0.2         # weight of the newest sample in the moving average write latency
+DUPLICATE_WINDOW = 5            # seconds within which the same event from the other transport is a duplicate
+LOCAL_HEARTBEAT = 10            # seconds between websocket pings on the local transport
+
+
+class LightwaveSmartWebsocket(LWWebsocket):
+    """Websocket connecting over the shared session instead of a session of its own per activation.
+
+    heartbeat is aiohttp's websocket ping interval, None for no pings (the cloud connection is kept
+    alive by the watchdog's probe, at the configured keep-alive interval).
+    """
+
+    def __init__(self, auth, session, device_id=None, url=TRANS_SERVER, heartbeat=LOCAL_HEARTBEAT):
+        super().__init__(auth, device_id)
+        self._shared_session = session
+        self._url = url
+        self._heartbeat = heartbeat
+
+    def activate(self, source=None):
+        if self._active:
+            _LOGGER.warning(f"activate ({source}/{id(self)}): Already active")
+            return
+
+        _LOGGER.info(f"activate ({source}/{id(self)}): Activating")
+        self._active = True
+
+        self._session = self._shared_session
+
+        task = asyncio.create_task(self._consumer_handler())
+        self.background_tasks.add(task)
+
+        task = asyncio.create_task(self._process_transaction_queue())
+        self.background_tasks.add(task)
+
+    async def async_deactivate(self, source=None):
+        # the shared session is owned by Home Assistant, it must not be closed
+        self._session = None
+        await super().async_deactivate(source)
+
+    @property
+    def connected(self):
+        return self._active and self._websocket is not None and not self._websocket.closed
+
+    async def _connect_to_server(self, max_tries=None, source=None):
+        # as LWWebsocket, connecting to self._url and never recreating the (shared) session
+        _LOGGER.info(f"connect_to_server: Starting ({source}) - {self._url}")
+        await self.clean_up()
+
+        network_retry_delay = 30        # retry every 30 seconds, changing to 300 after 20 attempts (10 mins)
+        if max_tries is not None:
+            network_retry_delay = 5
+
+        attempt = 0
+        while self._active and (max_tries is None or attempt < max_tries):
+            attempt += 1
+
+            retryDelay = network_retry_delay
+            if attempt > 20 and max_tries is None:
+                retryDelay = 300
+
+            try:
+                _LOGGER.info(f"connect_to_server: Connecting to websocket ({source}) - Attempt {attempt}")
+                self._websocket = await self._session.ws_connect(self._url, heartbeat=self._heartbeat)
+                _LOGGER.info(f"connect_to_server: Connected to websocket ({source}) - Attempt {attempt}")
+                break
+
+            except (aiohttp.ClientError, ConnectionRefusedError, OSError) as exp:
+                retryMsg = f"Network error - exception: '{repr(exp)}'"
+
+            except Exception as exp:
+                retryMsg = f"Unknown exception - exception: '{repr(exp)}'"
+
+            if max_tries is not None and attempt >= max_tries:
+                _LOGGER.warning(f"connect_to_server ({source}): {retryMsg} - Attempt: {attempt} of {max_tries}")
+                break
+
+            _LOGGER.warning(f"connect_to_server ({source}): {retryMsg} - Attempt: {attempt} - Retrying at: {datetime.datetime.now() + datetime.timedelta(seconds=retryDelay)}")
+            await asyncio.sleep(retryDelay)
+
+        return self._websocket is not None and not self._websocket.closed
+
+
+class LightwaveSmartLink(lightwave_smart.LWLink2):
+    """LWLink2 whose auth and websocket traffic use Home Assistant's shared aiohttp session.
+
+    With a local URL a second websocket speaking the same protocol is connected to the hub on the
+    LAN. Events are taken from both (duplicates dropped), writes are sent over whichever transport
+    is up and currently has the lower moving average latency, falling back to the cloud if a local
+    write fails.
+    """
+
+    def __init__(self, session, device_id=None, auth=None, local_url=None):
+        super().__init__(device_id=device_id, auth=auth if auth else HassSessionAuth(session))
+
+        ws = LightwaveSmartWebsocket(self.auth, session, device_id, heartbeat=None)
+        ws._eventHandlers = self._ws._eventHandlers
+        ws._eventHandlers["feature"] = {None: [self._async_cloud_feature_event]}
+        self._ws = ws
+
+        self._local_ws = None
+        if local_url:
+            self._local_ws = LightwaveSmartWebsocket(self.auth, session, device_id, url=local_url)
+            self._local_ws.register_event_handler("feature", self._async_local_feature_event)
+
+        self._local_failed_until = 0
+        self._recent_events = {}    # (featureId, value) -> (transport, time)
+        self.transport_latency = {"cloud": None, "local": None}     # ms, moving average of writes
+        self.transport_writes = {"cloud": 0, "local": 0, "local_fallbacks": 0}
+
+        self.stats = LinkStats()
+        self._callbacks.append(self._async_stats_feature_event)
+        self.capture = None         # LinkCapture while the capture service runs
+        self._featureset_contexts = {}
+        self.device_info_cache = {}     # see utils.make_device_info and make_entity_device_info
+        self.structure_filter = None    # structure ids to load (CONF_STRUCTURES), all if empty
+        self.root_structure_ids = []    # every structure of the account, loaded or not
+        self.hierarchy_fingerprint = None   # of the last hierarchy read, None if a group could not be read (see LinkResync)
+
+        self.prune_events = False       # set once the entities are set up, see get_wanted_features
+        self._entity_featuresets = Counter()    # featureset_id -> entities added to Home Assistant
+        self._entity_features = Counter()       # (featureset_id, feature name) -> added entities wanting the feature
+        self._all_events_entities = 0   # entities that need the events of every feature
+        self._wanted_features = None    # feature ids of the entity featuresets, built on first use
+        self._hierarchy_fingerprint = None      # built while the groups are read
+
+    #########################################################
+    # Hierarchy
+    #########################################################
+
+    def is_structure_selected(self, thing_id):
+        return not self.structure_filter or self.get_structure_id(thing_id) in self.structure_filter
+
+    def filter_group_ids(self, group_ids):
+        """The root group ids of the selected structures, all of them if none of the selected structures exist."""
+        selected = [group_id for group_id in group_ids if self.is_structure_selected(group_id)]
+        if not selected and group_ids:
+            _LOGGER.warning(f"filter_group_ids: None of the selected structures {self.structure_filter} exist, loading all")
+            return list(group_ids)
+        return selected
+
+    async def _async_read_groups(self):
+        """Read the hierarchy of the selected structures only, the others are not read at all."""
+        self.root_structure_ids = list(dict.fromkeys(self.get_structure_id(group_id) for group_id in self._group_ids))
+        self._group_ids = self.filter_group_ids(self._group_ids)
+        self._hierarchy_fingerprint = set()
+        await super()._async_read_groups()
+        fingerprint, self._hierarchy_fingerprint = self._hierarchy_fingerprint, None
+        self.hierarchy_fingerprint = frozenset(fingerprint) if fingerprint is not None else None
+
+    def set_structure_data_from_hierarchy(self, groupId, hierarchy_response):
+        """Called by the library with the group.hierarchy response of each group read."""
+        super().set_structure_data_from_hierarchy(groupId, hierarchy_response)
+        if self._hierarchy_fingerprint is None:
+            return
+        try:
+            self._hierarchy_fingerprint |= get_hierarchy_fingerprint(hierarchy_response)
+        except Exception:
+            # compared with the next reconnect's fingerprint instead
+            self._hierarchy_fingerprint = None
+
+    def get_featuresets(self, featuresets, devices, features):
+        """Called by the library per group read from the hierarchy, the device info derived from it is stale."""
+        super().get_featuresets(featuresets, devices, features)
+        self.device_info_cache.clear()
+
+    def get_featureset_context(self, featureset_id):
+        """The FeaturesetContext shared by the entities of the featureset, rebuilt if the hierarchy was read again."""
+        context = self._featureset_contexts.get(featureset_id)
+        if context is None or context.featureset is not self.featuresets[featureset_id]:
+            context = self._featureset_contexts[featureset_id] = FeaturesetContext(self, featureset_id)
+        return context
+
+    #########################################################
+    # Wanted features
+    #########################################################
+
+    def add_entity_featureset(self, featureset_id, feature_names, all_events=False):
+        """An entity of the featureset was added to Home Assistant (disabled entities never are), wanting the named features."""
+        self._entity_featuresets[featureset_id] += 1
+        self._entity_features.update((featureset_id, name) for name in feature_names)
+        self._all_events_entities += all_events
+        self._wanted_features = None
+
+    def remove_entity_featureset(self, featureset_id, feature_names, all_events=False):
+        self._entity_featuresets -= Counter({featureset_id: 1})
+        self._entity_features -= Counter((featureset_id, name) for name in feature_names)
+        self._all_events_entities -= all_events
+        self._wanted_features = None
+
+    def is_featureset_wanted(self, featureset_id):
+        return not self.prune_events or self._all_events_entities > 0 or featureset_id in self._entity_featuresets
+
+    def get_wanted_features(self):
+        """Ids of the features wanted by an enabled entity, None while every feature is wanted.
+
+        An entity wants the features of its own state, and the features shown in its attributes
+        (see LWRF2FeaturesetEntity.get_wanted_feature_names).
+        """
+        if not self.prune_events or self._all_events_entities > 0:
+            return None
+        if self._wanted_features is None:
+            self._wanted_features = {
+                self.featuresets[featureset_id].features[name].id
+                for featureset_id, name in self._entity_features
+                if featureset_id in self.featuresets and name in self.featuresets[featureset_id].features
+            }
+        return self._wanted_features
+
+    def is_feature_wanted(self, feature_id):
+        wanted = self.get_wanted_features()
+        return wanted is None or feature_id in wanted
+
+    async def async_update_featureset_states(self):
+        """Read the states of the wanted features, of every feature before the entities are set up."""
+        wanted = self.get_wanted_features()
+        if wanted is None:
+            await super().async_update_featureset_states()
+            return
+        await async_read_featuresets(self, list(self._entity_featuresets), wanted)
+
+    #########################################################
+    # Stats
+    #########################################################
+
+    def _async_stats_feature_event(self, **kwargs):
+        feature = self.features.get(kwargs["feature_id"])
+        if feature is not None:
+            self.stats.record_feature_event(feature)
+
+    async def async_register_general_callback(self, callback):
+        await super().async_register_general_callback(self.stats.wrap_callback(callback))
+
+    async def async_register_feature_callback(self, featureset_id, callback):
+        await super().async_register_feature_callback(featureset_id, self.stats.wrap_callback(callback))
+
+    #########################################################
+    # Transports
+    #########################################################
+
+    def get_write_transport(self):
+        """The transport the next write will use, 'local' or 'cloud'."""
+        if self._local_ws is None or not self._local_ws.connected or time.monotonic() < self._local_failed_until:
+            return "cloud"
+        if not self._ws.connected:
+            return "local"
+
+        local, cloud = self.transport_latency["local"], self.transport_latency["cloud"]
+        if local is None or cloud is None or local <= cloud:
+            return "local"
+        return "cloud"
+
+    def _record_latency(self, transport, start):
+        latency = (time.monotonic() - start) * 1000
+        average = self.transport_latency[transport]
+        self.transport_latency[transport] = latency if average is None else average + LATENCY_SMOOTHING * (latency - average)
+        self.transport_writes[transport] += 1
+
+    def _async_reconnect_local(self):
+        if self._local_ws is None or not self._local_ws._active or self._local_ws.connected or self._local_ws._connectingTS:
+            return
+        if time.monotonic() < self._local_failed_until:
+            return
+        self._local_failed_until = time.monotonic() + LOCAL_RETRY_AFTER
+        task = asyncio.create_task(self._local_ws.async_connect(max_tries=1, source="local-retry"))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def async_write_feature(self, feature_id, value):
+        self._async_reconnect_local()
+        if self.get_write_transport() == "local":
+            write_message = LW_WebsocketMessage("feature", "write")
+            write_message.add_item({"featureId": feature_id, "value": value})
+            start = time.monotonic()
+            try:
+                responses = await asyncio.wait_for(self._local_ws.async_sendmessage(write_message, False, True), LOCAL_WRITE_TIMEOUT)
+            except Exception as e:
+                error = repr(e)
+            else:
+                # an item answered with an error (e.g. not authorised by the hub) is resent via the cloud
+                failed = [item for item in responses or [] if item.get("success") is not True]
+                if responses and not failed:
+                    self._record_latency("local", start)
+                    return
+                error = f"not accepted by the hub - {failed or responses}"
+
+            _LOGGER.warning(f"async_write_feature: Local write failed, using cloud for {LOCAL_RETRY_AFTER}s - {error}")
+            self._local_failed_until = time.monotonic() + LOCAL_RETRY_AFTER
+            self.transport_latency["local"] = None
+            self.transport_writes["local_fallbacks"] += 1
+
+        start = time.monotonic()
+        await super().async_write_feature(feature_id, value)
+        self._record_latency("cloud", start)
+
+    def _is_duplicate_event(self, transport, item):
+        payload = item.get("payload", {})
+        if "featureId" not in payload:
+            return False
+
+        now = time.monotonic()
+        key = (payload["featureId"], payload.get("value"))
+        seen = self._recent_events.get(key)
+        if seen is not None and seen[0] != transport and now - seen[1] < DUPLICATE_WINDOW:
+            del self._recent_events[key]
+            return True
+
+        self._recent_events[key] = (transport, now)
+        if len(self._recent_events) > 1000:
+            self._recent_events = {k: v for k, v in self._recent_events.items() if now - v[1] < DUPLICATE_WINDOW}
+        return False
+
+    def _get_drop_reason(self, item, wanted):
+        """Why the event item is not dispatched, None if it is."""
+        feature_id = item.get("payload", {}).get("featureId")
+        if feature_id is None:
+            return None
+        if feature_id not in self.features:
+            return "unknown_feature"      # of a structure that is not loaded, or not read yet
+        if wanted is not None and feature_id not in wanted:
+            return "no_enabled_entity"
+        return None
+
+    async def _async_transport_feature_event(self, transport, message):
+        received = time.monotonic()
+        _TRACE.debug("feature event via %s - %s items", transport, len(message["items"]))
+
+        wanted = self.get_wanted_features()
+        items = []
+        for item in message["items"]:
+            reason = self._get_drop_reason(item, wanted)
+            if reason is None:
+                items.append(item)
+            else:
+                self.stats.dropped_events[reason] += 1
+        if not items:
+            return
+
+        if self._local_ws is not None:
+            items = [item for item in items if not self._is_duplicate_event(transport, item)]
+            if not items:
+                return
+        if len(items) != len(message["items"]):
+            message = {**message, "items": items}
+        if self.capture is not None:
+            self.capture.record_message(transport, message)
+
+        # entities scheduling an update from their callbacks time it from here (see LWRF2Entity)
+        self.stats.event_received = received
+        try:
+            await self._feature_event_handler(message)
+        finally:
+            self.stats.event_received = None
+
+    async def _async_cloud_feature_event(self, message):
+        await self._async_transport_feature_event("cloud", message)
+
+    async def _async_local_feature_event(self, message):
+        await self._async_transport_feature_event("local", message)
+
+    #########################################################
+    # Activation
+    #########################################################
+
+    async def async_activate(self, max_tries=None, force_keep_alive_secs=0, source="link-activate", connect_callback=None):
+        connected = await super().async_activate(max_tries, force_keep_alive_secs, source, connect_callback)
+
+        if connected and self._local_ws is not None:
+            # the local hub is optional, connect in the background
+            self._local_ws.activate(source=f"local-{source}")
+            task = asyncio.create_task(self._local_ws.async_connect(max_tries=1, source=f"local-{source}"))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+        return connected
+
+    async def async_deactivate(self, source="link-deactivate"):
+        if self._local_ws is not None and self._local_ws._active:
+            await self._local_ws.async_deactivate(f"local-{source}")
+        await super().async_deactivate(source)
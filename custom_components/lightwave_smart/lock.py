@@ -1,12 +1,14 @@
 import logging
-from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, DOMAIN
+from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, LIGHTWAVE_SCHEDULER, DOMAIN
 from homeassistant.components.lock import LockEntity, LockEntityDescription, LockEntityFeature
 from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
 from .utils import (
     make_entity_device_info,
-    get_extra_state_attributes
+    get_extra_state_attributes,
+    is_feature_changed
 )
+from .entity import LWRF2FeaturesetEntity
 
 DEPENDENCIES = ['lightwave_smart']
 _LOGGER = logging.getLogger(__name__)
@@ -22,35 +24,29 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 
     locks = []
     link = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_LINK2]
+    scheduler = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_SCHEDULER]
 
     for featureset_id, name in link.get_with_feature("protection"):
         try:
-            locks.append(LWRF2Lock(name, featureset_id, link, LOCK))
+            locks.append(LWRF2Lock(name, featureset_id, link, scheduler, LOCK))
         except Exception as e: _LOGGER.exception("Could not add LWRF2Lock")
 
     hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_ENTITIES].extend(locks)
     async_add_entities(locks)
 
-class LWRF2Lock(LockEntity):
+class LWRF2Lock(LWRF2FeaturesetEntity, LockEntity):
     """Representation of a LightwaveRF light."""
 
     _attr_has_entity_name = True
     _attr_should_poll = False
 
-    def __init__(self, name, featureset_id, link, description):   
+    def __init__(self, name, featureset_id, link, scheduler, description):   
         _LOGGER.debug("Adding lock: %s - %s - %s ", name, description.key, featureset_id)
-        self._featureset_id = featureset_id
-        self._lwlink = link
+        self._lw_context = link.get_featureset_context(featureset_id)
+        self._scheduler = scheduler
 
         self.entity_description = description
 
-        self._featureset = self._lwlink.featuresets[self._featureset_id]
-        self._device = self._featureset.device
-
-        self._state = \
-            self._featureset.features["protection"].state
-
-        self._gen2 = self._featureset.is_gen2()
         self._attr_assumed_state = not self._gen2
 
         self._attr_unique_id = f"{self._featureset_id}_{self.entity_description.key}"
@@ -66,37 +62,36 @@ class LWRF2Lock(LockEntity):
     @callback
     def async_update_callback(self, **kwargs):
         """Update the component's state."""
-        self.async_schedule_update_ha_state(True)
-
-    async def async_update(self):
-        """Update state"""
-        self._state = \
-            self._featureset.features["protection"].state
+        if is_feature_changed(kwargs):
+            self.async_schedule_update_ha_state()
 
     @property
     def is_locked(self):
         """Return the protection (lock) state."""
-        return self._state == 1
+        return self._featureset.features["protection"].state == 1
 
     async def async_lock(self, **kwargs):
         """Turn the Lightwave lock on."""
         _LOGGER.debug("HA lock.lock received, kwargs: %s", kwargs)
 
-        self._state = 1
-        feature_id = self._featureset.features['protection'].id
-        await self._lwlink.async_write_feature(feature_id, 1)
-
-        self.async_schedule_update_ha_state()
+        await self._async_write_protection(1)
 
     async def async_unlock(self, **kwargs):
         """Turn the Lightwave lock off"""
         _LOGGER.debug("HA lock.unlock received, kwargs: %s", kwargs)
 
-        self._state = 0
-        feature_id = self._featureset.features['protection'].id
-        await self._lwlink.async_write_feature(feature_id, 0)
+        await self._async_write_protection(0)
 
-        self.async_schedule_update_ha_state()
+    async def _async_write_protection(self, value):
+        """Shown as locking/unlocking until written, the state then follows the protection feature."""
+        self._attr_is_locking, self._attr_is_unlocking = value == 1, value == 0
+        self.async_write_ha_state()
+        try:
+            feature_id = self._featureset.features['protection'].id
+            await self._scheduler.async_run_entity_command(self, self._lwlink.async_write_feature, feature_id, value)
+        finally:
+            self._attr_is_locking = self._attr_is_unlocking = False
+            self.async_schedule_update_ha_state()
 
     @property
     def extra_state_attributes(self):
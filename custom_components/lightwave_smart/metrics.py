@@ -0,0 +1,84 @@
+"""Prometheus text format metrics for Lightwave Smart.
+
+Counters are kept as plain integers by LinkStats and the histograms are fixed bucket counts, the
+exposition text is only built when the endpoint is scraped.
+"""
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+try:
+    from homeassistant.components.http import KEY_HASS
+except ImportError:
+    KEY_HASS = "hass"
+
+from .const import DOMAIN, LIGHTWAVE_LINK2, LIGHTWAVE_COUNTERS, LIGHTWAVE_SCHEDULER
+
+PREFIX = "lightwave_smart"
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{str(value)}"'.replace("\n", " ") for key, value in labels.items())
+
+
+class MetricsWriter:
+    def __init__(self):
+        self._metrics = {}      # name -> (type, help, [lines])
+
+    def add(self, name, metric_type, help_text, value, **labels):
+        self._metrics.setdefault(name, (metric_type, help_text, []))[2].append(f"{PREFIX}_{name}{{{_labels(**labels)}}} {value}")
+
+    def add_histogram(self, name, help_text, histogram, **labels):
+        lines = self._metrics.setdefault(name, ("histogram", help_text, []))[2]
+        cumulative = 0
+        for bucket, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f"{PREFIX}_{name}_bucket{{{_labels(**labels, le=bucket)}}} {cumulative}")
+        lines.append(f"{PREFIX}_{name}_bucket{{{_labels(**labels, le='+Inf')}}} {histogram.count}")
+        lines.append(f"{PREFIX}_{name}_sum{{{_labels(**labels)}}} {histogram.sum}")
+        lines.append(f"{PREFIX}_{name}_count{{{_labels(**labels)}}} {histogram.count}")
+
+    def render(self):
+        output = []
+        for name, (metric_type, help_text, lines) in self._metrics.items():
+            output.append(f"# HELP {PREFIX}_{name} {help_text}")
+            output.append(f"# TYPE {PREFIX}_{name} {metric_type}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+
+def get_metrics(hass):
+    writer = MetricsWriter()
+    for entry_id, entry_data in hass.data.get(DOMAIN, {}).items():
+        if not isinstance(entry_data, dict) or LIGHTWAVE_LINK2 not in entry_data:
+            continue
+
+        stats = entry_data[LIGHTWAVE_LINK2].stats
+        for feature_type, count in stats.feature_type_events.items():
+            writer.add("feature_events_total", "counter", "Feature events received", count, entry=entry_id, feature_type=feature_type)
+        writer.add("state_writes_total", "counter", "Entity state writes", sum(stats.state_writes.values()), entry=entry_id)
+        writer.add("reconnects_total", "counter", "Reconnects to Lightwave", max(stats.connects - 1, 0), entry=entry_id)
+        writer.add("token_refreshes_total", "counter", "Access token refreshes", stats.token_refreshes, entry=entry_id)
+        for command, histogram in stats.command_latency.items():
+            writer.add_histogram("command_latency_seconds", "Command latency including queueing", histogram, entry=entry_id, command=command)
+        writer.add_histogram("event_latency_seconds", "Feature event arrival to entity state write", stats.event_latency, entry=entry_id)
+
+        for name, count in entry_data.get(LIGHTWAVE_COUNTERS, {}).items():
+            writer.add(f"{name}_total", "counter", f"Count of {name.replace('_', ' ')}", count, entry=entry_id)
+
+        scheduler = entry_data.get(LIGHTWAVE_SCHEDULER)
+        if scheduler is not None:
+            writer.add("command_queue_depth", "gauge", "Commands waiting to be sent", scheduler.queue_depth, entry=entry_id)
+
+    return writer.render()
+
+
+class LightwaveMetricsView(HomeAssistantView):
+    """Expose the link and entity counters of all config entries for scraping."""
+
+    url = "/api/lightwave_smart/metrics"
+    name = "api:lightwave_smart:metrics"
+    requires_auth = True
+
+    async def get(self, request):
+        hass = request.app[KEY_HASS]
+        return web.Response(text=get_metrics(hass), content_type="text/plain", charset="utf-8")
@@ -0,0 +1,73 @@
+import logging
+from functools import partial
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PendingWriteTracker:
+    """Track optimistic feature writes of an entity until the device confirms them.
+
+    While a write is pending the entity reports the written value, once the feature
+    callback reports the written value the pending write is cleared. Other values (e.g. a
+    read that returns the state from before the write) leave the timeout to decide. If no confirmation arrives
+    within the ack timeout the entity reverts to the last confirmed state of the feature.
+    """
+
+    __slots__ = ("_entity", "_timeout", "_counters", "_pending")
+
+    def __init__(self, entity, timeout, counters):
+        self._entity = entity
+        self._timeout = timeout
+        self._counters = counters
+        self._pending = {}      # feature name -> (value, cancel timer)
+
+    def get(self, feature, default=None):
+        """Return the pending value for the feature, or default if nothing is pending."""
+        pending = self._pending.get(feature)
+        return default if pending is None else pending[0]
+
+    def start(self, feature, value):
+        self.clear(feature)
+        cancel = async_call_later(self._entity.hass, self._timeout, partial(self._async_timeout, feature))
+        self._pending[feature] = (value, cancel)
+
+    def confirm(self, feature, new_value):
+        """Called from the feature callback, the device has reported the feature state."""
+        pending = self._pending.get(feature)
+        if pending is not None and pending[0] == new_value:
+            self.clear(feature)
+            self._counters["ack_confirmed"] += 1
+            return True
+        return False
+
+    def clear(self, feature):
+        pending = self._pending.pop(feature, None)
+        if pending is not None:
+            pending[1]()
+
+    def clear_all(self):
+        for feature in list(self._pending):
+            self.clear(feature)
+
+    async def async_write(self, feature, value, write):
+        """Optimistically set the feature value, then await the write to Lightwave."""
+        self.start(feature, value)
+        self._entity.async_write_ha_state()
+        try:
+            await write
+        except Exception:
+            self.clear(feature)
+            self._counters["write_failures"] += 1
+            self._entity.async_schedule_update_ha_state(True)
+            raise
+
+    @callback
+    def _async_timeout(self, feature, _now):
+        if self._pending.pop(feature, None) is None:
+            return
+
+        self._counters["ack_timeouts"] += 1
+        _LOGGER.info("No confirmation received within %ss for '%s' of %s, reverting to last confirmed state", self._timeout, feature, self._entity.entity_id)
+        self._entity.async_schedule_update_ha_state(True)
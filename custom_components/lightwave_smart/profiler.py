@@ -0,0 +1,56 @@
+"""On-demand profiling of the integration's callbacks, entity state writes and commands."""
+import cProfile
+import io
+import logging
+import pstats
+from collections import defaultdict
+
+_LOGGER = logging.getLogger(__name__)
+
+REPORT_TOP = 40
+
+
+def start_profile():
+    """Enable a new cProfile profile, None if another profiler (e.g. the profiler integration) is active."""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as e:
+        _LOGGER.warning(f"profile: Cannot start profiling, another profiler is active - {e}")
+        return None
+    return profile
+
+
+class ScopedProfiler:
+    """Profile of the integration's callbacks, state writes and commands for one config entry.
+
+    The cProfile profile is shared by the config entries of a profile service call, it is enabled
+    once for the whole run (only one profiler can be active, see start_profile) and the report is
+    restricted to the integration's code. Feature callbacks and state writes are timed per entity
+    class, commands are coroutines interleaved with other work, for those the wall time is recorded.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.timings = defaultdict(lambda: [0, 0.0])     # (kind, entity class, feature key) -> [calls, seconds]
+
+    def record(self, key, seconds):
+        timing = self.timings[key]
+        timing[0] += 1
+        timing[1] += seconds
+
+    def report(self, seconds):
+        lines = [f"Lightwave Smart profile - {seconds}s", ""]
+        lines.append(f"{'kind':<12} {'entity class / command':<36} {'feature key':<24} {'calls':>8} {'total ms':>10} {'mean ms':>9}")
+        for (kind, name, key), (calls, total) in sorted(self.timings.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{kind:<12} {name:<36} {str(key or ''):<24} {calls:>8} {total * 1000:>10.2f} {total * 1000 / calls:>9.3f}")
+
+        stream = io.StringIO()
+        try:
+            stats = pstats.Stats(self.profile, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats("lightwave_smart", REPORT_TOP)
+        except TypeError:
+            # nothing was profiled
+            stream.write("No callbacks or state writes were profiled\n")
+        lines += ["", stream.getvalue()]
+        return "\n".join(lines)
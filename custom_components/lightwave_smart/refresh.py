@@ -0,0 +1,204 @@
+import heapq
+import logging
+import time
+from datetime import timedelta
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from lightwave_smart.message import LW_WebsocketMessage
+from .scheduler import PRIORITY_BULK
+from .trace import get_tracer
+
+_LOGGER = logging.getLogger(__name__)
+_TRACE = get_tracer(_LOGGER, "refresh")
+
+
+def get_identifier_featureset_ids(link, identifier):
+    """Return the featuresets for a featureset id or a device id (as used in device registry identifiers)."""
+    if identifier in link.featuresets:
+        return [identifier]
+    if identifier in link.devices:
+        return [featureset.featureset_id for featureset in link.devices[identifier].featuresets]
+    return []
+
+
+async def async_read_featuresets(link, featureset_ids, wanted=None):
+    """Re-read the readable features of the given featuresets (only those in wanted, if given), batched into a single request.
+
+    Responses are processed by the features as for a full read, so changes reach the
+    entities through the normal feature callbacks. Returns the number of features read.
+    """
+    def process_read_item_cb(response):
+        feature = id_map.get(response["itemId"])
+        if feature is None:
+            return
+        try:
+            feature.process_feature_read(response)
+        except Exception as e:
+            _TRACE.report("async_read_featuresets - process_read_item_cb: Error processing response - feature: %s - response: %s - %s", feature.id, response, e, level=logging.ERROR)
+
+    read_message = LW_WebsocketMessage("feature", "read", process_read_item_cb)
+    id_map = {}
+    feature_ids = set()
+    for featureset_id in featureset_ids:
+        featureset = link.featuresets.get(featureset_id)
+        if featureset is None:
+            continue
+        for feature in featureset.features.values():
+            if feature.can_read and feature.id not in feature_ids and (wanted is None or feature.id in wanted):
+                feature_ids.add(feature.id)
+                item_id = read_message.add_item({"featureId": feature.id})
+                id_map[item_id] = feature
+
+    if not id_map:
+        return 0
+
+    _TRACE.debug("async_read_featuresets: Reading %s features of %s featuresets", len(id_map), len(featureset_ids))
+    await link._ws.async_sendmessage(read_message)
+    return len(id_map)
+
+
+class FeaturesetSweeper:
+    """Background consistency sweep, re-reads a small rotating slice of featuresets each interval.
+
+    Featuresets that have gone longest without an event (or a sweep) are read first, any
+    differences are delivered by the features through the normal callback path.
+    """
+
+    def __init__(self, hass, link, scheduler, interval, batch_size):
+        self._hass = hass
+        self._link = link
+        self._scheduler = scheduler
+        self._interval = interval
+        self._batch_size = batch_size
+
+        self._last_seen = {}    # featureset_id -> monotonic time of the last event or sweep
+        self._cancel = None
+        self._sweeping = False
+
+    async def async_start(self):
+        await self._link.async_register_general_callback(self._async_feature_event)
+        self._cancel = async_track_time_interval(self._hass, self._async_sweep, timedelta(seconds=self._interval))
+
+    def stop(self):
+        if self._cancel is not None:
+            self._cancel()
+            self._cancel = None
+
+    @callback
+    def _async_feature_event(self, **kwargs):
+        feature = self._link.features.get(kwargs["feature_id"])
+        if feature is None:
+            return
+        now = time.monotonic()
+        for featureset in feature.feature_sets:
+            self._last_seen[featureset.featureset_id] = now
+
+    def _get_next_slice(self):
+        featureset_ids = [
+            featureset_id for featureset_id, featureset in self._link.featuresets.items()
+            if self._link.is_featureset_wanted(featureset_id) and any(feature.can_read for feature in featureset.features.values())
+        ]
+        return heapq.nsmallest(self._batch_size, featureset_ids, key=lambda featureset_id: self._last_seen.get(featureset_id, 0))
+
+    async def _async_sweep(self, _now=None):
+        if self._sweeping:
+            _LOGGER.debug("FeaturesetSweeper: Previous sweep still running, skipping")
+            return
+
+        featureset_ids = self._get_next_slice()
+        if not featureset_ids:
+            return
+
+        now = time.monotonic()
+        for featureset_id in featureset_ids:
+            self._last_seen[featureset_id] = now
+
+        self._sweeping = True
+        try:
+            await self._scheduler.async_run(
+                async_read_featuresets, self._link, featureset_ids, self._link.get_wanted_features(), priority=PRIORITY_BULK
+            )
+        except Exception as e:
+            _LOGGER.warning(f"FeaturesetSweeper: Error reading featuresets: {featureset_ids} - {e}")
+        finally:
+            self._sweeping = False
+
+
+def get_hierarchy_fingerprint(hierarchy_response):
+    """Fingerprint entries of a group.hierarchy response: (featureset id, name, feature ids) per featureset."""
+    return {
+        (featureset["groupId"], featureset["name"], frozenset(featureset["features"]))
+        for featureset in hierarchy_response["payload"]["featureSet"]
+    }
+
+
+async def async_read_structure_fingerprint(link):
+    """Read the hierarchy fingerprint from Lightwave, without the device and feature details of a full hierarchy read.
+
+    Returns None if any part of the structure could not be read.
+    """
+    readmess = LW_WebsocketMessage("user", "rootGroups")
+    readmess.add_item()
+    responses = await link._ws.async_sendmessage(readmess)
+
+    group_ids = []
+    for item in responses:
+        if ("success" in item and item["success"] != True) or "groupIds" not in item.get("payload", {}):
+            _LOGGER.warning(f"async_read_structure_fingerprint: Error reading user.rootGroups - {item}")
+            return None
+        group_ids += item["payload"]["groupIds"]
+
+    fingerprint = set()
+    for group_id in link.filter_group_ids(group_ids):
+        read_hierarchy = LW_WebsocketMessage("group", "hierarchy")
+        read_hierarchy.add_item({"groupId": group_id})
+        hierarchy_responses = await link._ws.async_sendmessage(read_hierarchy)
+
+        try:
+            fingerprint |= get_hierarchy_fingerprint(hierarchy_responses[0])
+        except Exception as e:
+            _LOGGER.warning(f"async_read_structure_fingerprint: Error reading group hierarchy - groupId: {group_id} - {hierarchy_responses} - {e}")
+            return None
+
+    return frozenset(fingerprint)
+
+
+class LinkResync:
+    """Connect callback for the link.
+
+    The hierarchy is read in full on the first connect only. On a reconnect the existing hierarchy
+    objects are kept and only the feature states are re-read, unless the structure has changed in
+    which case the config entry is reloaded to pick up the new hierarchy (and entities).
+
+    The first fingerprint is taken from the group.hierarchy responses of the full read (see
+    LightwaveSmartLink.hierarchy_fingerprint), later ones are read with async_read_structure_fingerprint,
+    so they compare like for like without reading the hierarchy twice. If the structure cannot be read
+    it is treated as unchanged, a transient read error on a reconnect should not reload the config entry.
+    """
+
+    def __init__(self, hass, config_entry, link):
+        self._hass = hass
+        self._config_entry = config_entry
+        self._link = link
+        self._hierarchy_read = False
+        self._fingerprint = None
+
+    async def async_on_connect(self):
+        self._link.stats.connects += 1
+        if not self._hierarchy_read:
+            await self._link.async_get_hierarchy()
+            self._hierarchy_read = True
+            self._fingerprint = self._link.hierarchy_fingerprint
+            return
+
+        fingerprint = await async_read_structure_fingerprint(self._link)
+        if fingerprint is not None:
+            if self._fingerprint is None:
+                self._fingerprint = fingerprint
+            elif fingerprint != self._fingerprint:
+                _LOGGER.info("LinkResync: Lightwave structure has changed since the last connect, reloading")
+                self._hass.config_entries.async_schedule_reload(self._config_entry.entry_id)
+                return
+
+        _LOGGER.debug("LinkResync: Structure unchanged (or could not be read), re-reading feature states")
+        await self._link.async_update_featureset_states()
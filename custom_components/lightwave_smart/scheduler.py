@@ -0,0 +1,128 @@
+import asyncio
+import itertools
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Priority classes, lower values are sent first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_AUTOMATION = 1
+PRIORITY_BULK = 2
+PRIORITY_FIRMWARE = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_AUTOMATION: "automation",
+    PRIORITY_BULK: "bulk",
+    PRIORITY_FIRMWARE: "firmware",
+}
+
+
+def context_priority(context):
+    """User initiated actions (UI taps, voice etc) carry a user_id, anything else is treated as automation."""
+    if context is not None and context.user_id is not None:
+        return PRIORITY_INTERACTIVE
+    return PRIORITY_AUTOMATION
+
+
+class CommandScheduler:
+    """Send commands to Lightwave with a concurrency limit, a rate limit and priority classes.
+
+    Commands are queued by priority (then by arrival) and run by a fixed number of workers,
+    a worker waits for the next free rate slot before it takes the next command off the queue.
+    """
+
+    def __init__(self, hass, concurrency, rate, stats=None):
+        self._hass = hass
+        self._stats = stats
+        self._concurrency = max(1, concurrency)
+        self._interval = 1 / rate if rate else 0
+
+        self._queue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers = []
+        self._next_slot = 0
+        self._slot_lock = asyncio.Lock()
+        self._running = 0
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        for i in range(self._concurrency):
+            self._workers.append(
+                self._hass.async_create_background_task(self._worker(), f"lightwave_smart command worker {i}")
+            )
+
+    async def async_stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        while not self._queue.empty():
+            future = self._queue.get_nowait()[-1]
+            if not future.done():
+                future.cancel()
+
+    async def async_run(self, command, *args, priority=PRIORITY_AUTOMATION):
+        """Queue command(*args) and return its result once it has been run."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((priority, next(self._sequence), command, args, future))
+        if self._stats is None:
+            return await future
+
+        # latency as seen by the caller, queueing included
+        start = time.monotonic()
+        try:
+            return await future
+        finally:
+            self._stats.record_command(command, time.monotonic() - start)
+
+    async def async_run_entity_command(self, entity, command, *args):
+        """Queue a command on behalf of an entity, prioritised by the context of the service call."""
+        return await self.async_run(command, *args, priority=context_priority(entity._context))
+
+    async def _async_next_command(self):
+        """Wait for the next free rate slot, then take the highest priority command off the queue.
+
+        A command is only taken once it can be sent, so one queued meanwhile at a higher priority
+        overtakes the queued bulk commands. One worker at a time waits for the slot.
+        """
+        async with self._slot_lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_slot - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            while True:
+                item = await self._queue.get()
+                if not item[-1].done():
+                    break
+                # caller has gone away (cancelled)
+            self._next_slot = max(loop.time(), self._next_slot) + self._interval
+            return item
+
+    async def _worker(self):
+        while True:
+            priority, _, command, args, future = await self._async_next_command()
+            self._running += 1
+            try:
+                result = await command(*args)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._running -= 1
@@ -1,5 +1,5 @@
 import logging
-from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, DOMAIN
+from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, LIGHTWAVE_WATCHDOG, DOMAIN, CONF_SKIP_DIAGNOSTICS, DEFAULT_SKIP_DIAGNOSTICS
 from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
 # State Classes
 try:
@@ -33,29 +33,36 @@ except ImportError:
 # Units
 from homeassistant.const import PERCENTAGE, SIGNAL_STRENGTH_DECIBELS_MILLIWATT, LIGHT_LUX
 try:
-    from homeassistant.const import UnitOfElectricCurrent, UnitOfElectricPotential, UnitOfEnergy, UnitOfPower
+    from homeassistant.const import UnitOfElectricCurrent, UnitOfElectricPotential, UnitOfEnergy, UnitOfPower, UnitOfTime
     ELECTRIC_CURRENT_MILLIAMPERE = UnitOfElectricCurrent.MILLIAMPERE
     ELECTRIC_POTENTIAL_VOLT = UnitOfElectricPotential.VOLT
     ENERGY_WATT_HOUR = UnitOfEnergy.WATT_HOUR
     POWER_WATT = UnitOfPower.WATT
+    TIME_MILLISECONDS = UnitOfTime.MILLISECONDS
 except ImportError:
-    from homeassistant.const import (POWER_WATT, ENERGY_WATT_HOUR, ELECTRIC_POTENTIAL_VOLT, ELECTRIC_CURRENT_MILLIAMPERE)
+    from homeassistant.const import (POWER_WATT, ENERGY_WATT_HOUR, ELECTRIC_POTENTIAL_VOLT, ELECTRIC_CURRENT_MILLIAMPERE, TIME_MILLISECONDS)
 
 from homeassistant.core import callback
 from homeassistant.util import dt as dt_util
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.exceptions import ConfigEntryNotReady
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 from .utils import (
     make_entity_device_info,
-    get_extra_state_attributes
+    get_extra_state_attributes,
+    is_feature_changed
 )
+from .entity import LWRF2FeaturesetEntity
+from .trace import get_tracer
 
 RECOMMENDED_LUX_LEVEL = 300
 
 DEPENDENCIES = ['lightwave_smart']
 _LOGGER = logging.getLogger(__name__)
+_TRACE = get_tracer(_LOGGER, "callbacks")
 
 
 SENSORS_PRIMARY_TYPES = ["energy"]
@@ -157,12 +164,50 @@ SENSORS_DIAGNOSTIC = [
     )
 ]
 
+SENSORS_WATCHDOG = [
+    SensorEntityDescription(
+        key="linkLatency",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=STATE_CLASS_MEASUREMENT,
+        name="Link Latency",
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    SensorEntityDescription(
+        key="connectedSince",
+        device_class=DEVICE_CLASS_TIMESTAMP,
+        name="Connected Since",
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    SensorEntityDescription(
+        key="eventLatency",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=STATE_CLASS_MEASUREMENT,
+        name="Event Latency",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+]
+
+EVENT_LATENCY_INTERVAL = timedelta(seconds=60)
+
+# diagnostic categories that can be left out (CONF_SKIP_DIAGNOSTICS), by sensor key
+DIAGNOSTIC_CATEGORY_KEYS = {
+    "signal": {"rssi"},
+    "electrical": {"voltage", "current"},
+    "events": {"lastEvent"},
+}
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Find and return Lightwave sensors."""
 
     sensors = []
     link = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_LINK2]
 
+    skip = config_entry.options.get(CONF_SKIP_DIAGNOSTICS, DEFAULT_SKIP_DIAGNOSTICS)
+    skipped_keys = set().union(*(DIAGNOSTIC_CATEGORY_KEYS.get(category, ()) for category in skip))
+    skip_secondary = "secondary_energy" in skip
+    skipped_unique_ids = []
+
     for featureset_id, featureset in link.featuresets.items():
         if featureset.primary_feature_type in SENSORS_PRIMARY_TYPES:
             for description in SENSORS_PRIMARY:
@@ -171,14 +216,23 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         else:
             for description in SENSORS_SECONDARY:
                 if featureset.has_feature(description.key):
+                    if skip_secondary:
+                        skipped_unique_ids.append(f"{featureset_id}_{description.key}")
+                        continue
                     sensors.append(LWRF2Sensor(featureset.name, featureset_id, link, description, hass))
                 
         for description in SENSORS_DIAGNOSTIC:
             if featureset.has_feature(description.key):
+                if description.key in skipped_keys:
+                    skipped_unique_ids.append(f"{featureset_id}_{description.key}")
+                    continue
                 sensors.append(LWRF2Sensor(featureset.name, featureset_id, link, description, hass))
     
 
     for featureset_id, hubname in link.get_hubs():
+        if "lastEvent" in skipped_keys:
+            skipped_unique_ids.append(f"{featureset_id}_lastEvent")
+            continue
         try:
             sensors.append(LWRF2EventSensor(hubname, featureset_id, link, SensorEntityDescription(
                 key="lastEvent",
@@ -189,10 +243,31 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
             ), hass))
         except Exception as e: _LOGGER.exception("Could not add LWRF2EventSensor")
 
+    # link health is per config entry, shown on the first hub
+    watchdog = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_WATCHDOG]
+    for featureset_id, hubname in link.get_hubs()[:1]:
+        for description in SENSORS_WATCHDOG:
+            sensors.append(LWRF2WatchdogSensor(hubname, featureset_id, link, watchdog, description))
+
+    async_remove_skipped_entities(hass, skipped_unique_ids)
+
     hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_ENTITIES].extend(sensors)
     async_add_entities(sensors)
 
-class LWRF2Sensor(SensorEntity):
+@callback
+def async_remove_skipped_entities(hass, unique_ids):
+    """Remove the registry entries of sensors in skipped diagnostic categories, left from before they were skipped."""
+    registry = er.async_get(hass)
+    removed = 0
+    for unique_id in unique_ids:
+        entity_id = registry.async_get_entity_id("sensor", DOMAIN, unique_id)
+        if entity_id is not None:
+            registry.async_remove(entity_id)
+            removed += 1
+    if unique_ids:
+        _LOGGER.debug("Skipped %s diagnostic sensors, removed %s registry entries", len(unique_ids), removed)
+
+class LWRF2Sensor(LWRF2FeaturesetEntity, SensorEntity):
     """Representation of a LightwaveRF sensor."""
 
     _attr_has_entity_name = True
@@ -200,22 +275,18 @@ class LWRF2Sensor(SensorEntity):
     _attr_assumed_state = False
 
     def __init__(self, name, featureset_id, link, description, hass):
-        _LOGGER.debug(f"Adding sensor: {name} - {description.key} - {featureset_id}")
-        self._featureset_id = featureset_id
-        self._lwlink = link
+        _LOGGER.debug("Adding sensor: %s - %s - %s", name, description.key, featureset_id)
+        self._lw_context = link.get_featureset_context(featureset_id)
 
         self.entity_description = description
         
-        self._featureset = self._lwlink.featuresets[self._featureset_id]
-        self._device = self._featureset.device
-        
-        self._gen2 = self._featureset.is_gen2()
         self._attr_assumed_state = not self._gen2
 
         self._attr_unique_id = f"{self._featureset_id}_{self.entity_description.key}"
         self._attr_device_info = make_entity_device_info(self, name)
 
-        self._set_state(None)
+        # states may already have been read, callbacks are only made for subsequent changes
+        self._set_state(self._featureset.features[self.entity_description.key].state)
 
     async def async_added_to_hass(self):
         """Subscribe to events."""
@@ -225,17 +296,21 @@ class LWRF2Sensor(SensorEntity):
     def async_update_callback(self, **kwargs):
         """Update the component's state."""
         # async_update is called automatically
-        self.async_schedule_update_ha_state(True)
+        if is_feature_changed(kwargs):
+            self.async_schedule_update_ha_state(True)
 
     async def async_update(self):
         """Update state"""
         state = self._featureset.features[self.entity_description.key].state
         if state is None:
-            _LOGGER.debug(f"LWRF2Sensor:async_update - state is None for: {self._featureset_id} - {self.entity_description.key}")
+            _TRACE.debug("LWRF2Sensor:async_update - state is None for: %s - %s", self._featureset_id, self.entity_description.key)
             pass
         else:
             self._set_state(state)
 
+    def get_wanted_feature_names(self):
+        return super().get_wanted_feature_names() | {self.entity_description.key}
+
     @property
     def native_value(self):
         value = self._state
@@ -269,24 +344,20 @@ class LWRF2Sensor(SensorEntity):
                 self._state = dt_util.parse_datetime(f'{year}-{month:02}-{day:02}T{hour:02}:{min:02}:{second:02}Z')
         
 
-class LWRF2EventSensor(SensorEntity):
+class LWRF2EventSensor(LWRF2FeaturesetEntity, SensorEntity):
     """Representation of a LightwaveRF sensor."""
 
     _attr_has_entity_name = True
     _attr_should_poll = False
     _attr_assumed_state = False
+    _wants_all_events = True
 
     def __init__(self, name, featureset_id, link, description, hass):
         _LOGGER.debug("Adding event sensor: %s - %s - %s ", name, description.key, featureset_id)
-        self._featureset_id = featureset_id
-        self._lwlink = link
+        self._lw_context = link.get_featureset_context(featureset_id)
 
         self.entity_description = description
 
-        self._featureset = self._lwlink.featuresets[self._featureset_id]
-        self._device = self._featureset.device
-        
-        self._gen2 = self._featureset.is_gen2()
         self._attr_assumed_state = not self._gen2
 
         self._state = datetime.now(pytz.utc)
@@ -310,4 +381,50 @@ class LWRF2EventSensor(SensorEntity):
 
     @property
     def native_value(self):
-        return self._state
\ No newline at end of file
+        return self._state
+
+class LWRF2WatchdogSensor(LWRF2FeaturesetEntity, SensorEntity):
+    """Link health (latency, uptime) as measured by the link watchdog, and the event to state latency (p95)."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(self, name, featureset_id, link, watchdog, description):
+        _LOGGER.debug("Adding watchdog sensor: %s - %s - %s ", name, description.key, featureset_id)
+        self._lw_context = link.get_featureset_context(featureset_id)
+        self._watchdog = watchdog
+
+        self.entity_description = description
+
+        self._attr_unique_id = f"{self._featureset_id}_{self.entity_description.key}"
+        self._attr_device_info = make_entity_device_info(self, name)
+
+    async def async_added_to_hass(self):
+        """Subscribe to link health updates."""
+        if self.entity_description.key == "eventLatency":
+            # not written per event, that would add to the load it measures
+            self.async_on_remove(async_track_time_interval(self.hass, self._async_refresh, EVENT_LATENCY_INTERVAL))
+            return
+        self.async_on_remove(self._watchdog.async_add_listener(self.async_write_ha_state))
+
+    def get_wanted_feature_names(self):
+        # shows the link health, none of the hub's features
+        return set()
+
+    @callback
+    def _async_refresh(self, _now=None):
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        if self.entity_description.key == "eventLatency":
+            return self._lwlink.stats.get_event_latency_percentiles().get("p95")
+        if self.entity_description.key == "linkLatency":
+            return self._watchdog.latency
+        return self._watchdog.connected_since
+
+    @property
+    def extra_state_attributes(self):
+        if self.entity_description.key == "eventLatency":
+            return self._lwlink.stats.get_event_latency_percentiles()
+        return None
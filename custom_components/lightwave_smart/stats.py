@@ -0,0 +1,136 @@
+"""Runtime performance counters for the diagnostics download and the metrics endpoint."""
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+
+def get_callback_owner(callback):
+    """Name a feature callback by its entity (or object) for the counters."""
+    owner = getattr(callback, "__self__", None)
+    if owner is None:
+        return getattr(callback, "__qualname__", repr(callback))
+    return getattr(owner, "entity_id", None) or type(owner).__name__
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)     # seconds
+EVENT_LATENCY_SAMPLES = 1000    # most recent event latencies kept for the percentiles
+
+
+class Histogram:
+    """Fixed bucket histogram, counts[i] holds observations <= buckets[i] (the last is +Inf)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class LinkStats:
+    """Event, callback and state write counters of a link, plus setup phase timings."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.connects = 0
+        self.token_refreshes = 0
+        self.feature_type_events = Counter()
+        self.command_latency = defaultdict(Histogram)   # command name -> seconds
+        self.featureset_events = Counter()
+        self.dropped_events = Counter()             # reason -> feature events dropped by the link
+        self.callbacks = Counter()
+        self.callback_time = defaultdict(float)     # seconds
+        self.state_writes = Counter()
+        self.setup_phases = {}                      # name -> seconds
+        self.profiler = None                        # ScopedProfiler while the profile service runs
+
+        self.event_received = None                  # monotonic arrival time of the feature event being dispatched
+        self.event_latency = Histogram()            # seconds from event arrival to entity state write
+        self._event_latency_samples = deque(maxlen=EVENT_LATENCY_SAMPLES)
+
+    def record_feature_event(self, feature):
+        self.feature_type_events[feature.name] += 1
+        for featureset in feature.feature_sets:
+            self.featureset_events[featureset.featureset_id] += 1
+
+    def record_command(self, command, seconds):
+        name = getattr(command, "__name__", "unknown")
+        self.command_latency[name].observe(seconds)
+        if self.profiler is not None:
+            self.profiler.record(("command", name, None), seconds)
+
+    def record_state_write(self, entity_id):
+        self.state_writes[entity_id] += 1
+
+    def record_event_latency(self, seconds):
+        self.event_latency.observe(seconds)
+        self._event_latency_samples.append(seconds)
+
+    def get_event_latency_percentiles(self):
+        """Percentiles in ms of the recent event to state write latencies, empty if there are none."""
+        samples = sorted(self._event_latency_samples)
+        if not samples:
+            return {}
+        percentiles = {
+            f"p{point}": round(samples[min(len(samples) - 1, len(samples) * point // 100)] * 1000, 2)
+            for point in (50, 95, 99)
+        }
+        percentiles["max"] = round(samples[-1] * 1000, 2)
+        percentiles["count"] = self.event_latency.count
+        return percentiles
+
+    def wrap_callback(self, callback):
+        """Count and time a feature callback, keyed by its entity."""
+        @wraps(callback)
+        def timed_callback(**kwargs):
+            start = time.perf_counter()
+            try:
+                return callback(**kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                owner = get_callback_owner(callback)
+                self.callbacks[owner] += 1
+                self.callback_time[owner] += elapsed
+                profiler = self.profiler
+                if profiler is not None:
+                    owner_class = type(getattr(callback, "__self__", callback)).__name__
+                    profiler.record(("callback", owner_class, kwargs.get("feature")), elapsed)
+        return timed_callback
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.setup_phases[name] = round(time.perf_counter() - start, 3)
+
+    def as_dict(self):
+        uptime = max(time.monotonic() - self.started, 1)
+        return {
+            "uptime_seconds": round(uptime),
+            "setup_phases_seconds": dict(self.setup_phases),
+            "event_latency_ms": self.get_event_latency_percentiles(),
+            "dropped_events": dict(self.dropped_events),
+            "featureset_events": {
+                featureset_id: {"count": count, "per_hour": round(count * 3600 / uptime, 2)}
+                for featureset_id, count in self.featureset_events.most_common()
+            },
+            "entities": {
+                owner: {
+                    "callbacks": self.callbacks[owner],
+                    "callback_ms": round(self.callback_time[owner] * 1000, 3),
+                    "state_writes": self.state_writes[owner],
+                }
+                for owner in sorted(set(self.callbacks) | set(self.state_writes))
+            },
+            "total_callback_ms": round(sum(self.callback_time.values()) * 1000, 3),
+        }
@@ -1,5 +1,6 @@
 import logging
-from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, CONF_HOMEKIT, DOMAIN
+from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, LIGHTWAVE_COUNTERS, LIGHTWAVE_SCHEDULER, CONF_HOMEKIT, \
+    CONF_ACK_TIMEOUT, DEFAULT_ACK_TIMEOUT, DOMAIN
 from homeassistant.components.switch import (
     SwitchEntity,
     SwitchDeviceClass,
@@ -9,8 +10,11 @@ from homeassistant.helpers import entity_registry as er
 from homeassistant.core import callback
 from .utils import (
     make_entity_device_info,
-    get_extra_state_attributes
+    get_extra_state_attributes,
+    is_feature_changed
 )
+from .entity import LWRF2FeaturesetEntity
+from .pending import PendingWriteTracker
 
 
 DEPENDENCIES = ['lightwave_smart']
@@ -36,48 +40,45 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     link = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_LINK2]
 
     homekit = config_entry.options.get(CONF_HOMEKIT, False)
+    ack_timeout = config_entry.options.get(CONF_ACK_TIMEOUT, DEFAULT_ACK_TIMEOUT)
+    counters = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_COUNTERS]
+    scheduler = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_SCHEDULER]
     for featureset_id, name in link.get_switches():
         try:
-            switches.append(LWRF2Switch(name, featureset_id, link, homekit, SWITCH))
+            switches.append(LWRF2Switch(name, featureset_id, link, homekit, SWITCH, ack_timeout, counters, scheduler))
         except Exception as e: _LOGGER.exception("Could not add switch LWRF2Switch")
 
     for featureset_id, name in link.get_sockets():
         try:
-            switches.append(LWRF2Switch(name, featureset_id, link, homekit, SOCKET))
+            switches.append(LWRF2Switch(name, featureset_id, link, homekit, SOCKET, ack_timeout, counters, scheduler))
         except Exception as e: _LOGGER.exception("Could not add socket LWRF2Switch")
 
     hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_ENTITIES].extend(switches)
     async_add_entities(switches)
 
-class LWRF2Switch(SwitchEntity):
+class LWRF2Switch(LWRF2FeaturesetEntity, SwitchEntity):
     """Representation of a LightwaveRF socket/switch."""
 
     _attr_has_entity_name = True
     _attr_should_poll = False
     _attr_assumed_state = False
 
-    def __init__(self, name, featureset_id, link, homekit, description):
+    def __init__(self, name, featureset_id, link, homekit, description, ack_timeout, counters, scheduler):
         _LOGGER.debug("Adding socket/switch: %s - %s - %s ", name, description.key, featureset_id)
-        self._featureset_id = featureset_id
-        self._lwlink = link
+        self._lw_context = link.get_featureset_context(featureset_id)
+        self._scheduler = scheduler
         
         self.entity_description = description
         
-        self._featureset = self._lwlink.featuresets[self._featureset_id]
-        self._device = self._featureset.device
-
         self._homekit = homekit
 
-        self._gen2 = self._featureset.is_gen2()
         self._attr_assumed_state = not self._gen2
 
         self._attr_unique_id = f"{self._featureset_id}_{self.entity_description.key}"
         
         self._attr_device_info = make_entity_device_info(self, name)
 
-        self._state = \
-            self._featureset.features["switch"].state
-
+        self._pending = PendingWriteTracker(self, ack_timeout, counters)
 
     async def async_added_to_hass(self):
         """Subscribe to events."""
@@ -93,35 +94,35 @@ class LWRF2Switch(SwitchEntity):
             if entity_entry.hidden_by == er.RegistryEntryHider.INTEGRATION:
                 registry.async_update_entity(self.entity_id, hidden_by=None)
 
+    async def async_will_remove_from_hass(self):
+        """Cancel any pending write timers."""
+        self._pending.clear_all()
+
     @callback
     def async_update_callback(self, **kwargs):
         """Update the component's state."""
+        confirmed = self._pending.confirm(kwargs["feature"], kwargs["new_value"])
         if kwargs["feature"] == "uiButton":
             _LOGGER.debug("Button (socket) press event: %s %s", self.entity_id, kwargs["new_value"])
             self.hass.bus.fire("lightwave_smart.click",{"entity_id": self.entity_id, "code": kwargs["new_value"]},
         )
-        self.async_schedule_update_ha_state(True)
-
-    async def async_update(self):
-        """Update state"""
-        self._state = self._featureset.features["switch"].state
+        if confirmed or is_feature_changed(kwargs):
+            self.async_schedule_update_ha_state()
 
     @property
     def is_on(self):
         """Lightwave switch is on state."""
-        return self._state
+        return self._pending.get("switch", self._featureset.features["switch"].state)
 
     async def async_turn_on(self, **kwargs):
         """Turn the Lightwave switch on."""
-        # self._state = True
-        await self._lwlink.async_turn_on_by_featureset_id(self._featureset_id)
-        self.async_schedule_update_ha_state()
+        await self._pending.async_write("switch", 1,
+            self._scheduler.async_run_entity_command(self, self._lwlink.async_turn_on_by_featureset_id, self._featureset_id))
 
     async def async_turn_off(self, **kwargs):
         """Turn the Lightwave switch off."""
-        # self._state = False
-        await self._lwlink.async_turn_off_by_featureset_id(self._featureset_id)
-        self.async_schedule_update_ha_state()
+        await self._pending.async_write("switch", 0,
+            self._scheduler.async_run_entity_command(self, self._lwlink.async_turn_off_by_featureset_id, self._featureset_id))
 
     @property
     def extra_state_attributes(self):
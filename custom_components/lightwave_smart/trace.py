@@ -0,0 +1,55 @@
+"""Cheap tracing for hot paths.
+
+Messages are %-formatted by logging only when they are emitted, debug traces of busy subsystems are
+sampled, and repeated errors are reported at most once per interval (per message and first argument, usually
+the entity or feature) with a count of those suppressed.
+"""
+import logging
+import random
+import time
+
+# fraction of debug traces emitted per subsystem, subsystems not listed are not sampled
+SAMPLE_RATES = {
+    "events": 0.1,
+    "callbacks": 0.1,
+}
+ERROR_INTERVAL = 60     # seconds between reports of the same error
+
+
+class Tracer:
+    def __init__(self, logger, subsystem, sample_rate=None, error_interval=ERROR_INTERVAL):
+        self._logger = logger
+        self._subsystem = subsystem
+        self._sample_rate = SAMPLE_RATES.get(subsystem, 1.0) if sample_rate is None else sample_rate
+        self._error_interval = error_interval
+        self._errors = {}       # (message, first argument) -> [last reported, suppressed count]
+
+    def debug(self, msg, *args):
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return
+        if self._sample_rate < 1 and random.random() >= self._sample_rate:
+            return
+        self._logger.debug(f"[{self._subsystem}] {msg}", *args)
+
+    def report(self, msg, *args, level=logging.WARNING):
+        """Report an error at level, at most once per interval for the same message and first argument.
+
+        The first argument identifies what failed (entity, feature), so an error of one does not hide those of
+        others. The stack is only included with debug enabled.
+        """
+        now = time.monotonic()
+        key = (msg, args[0] if args else None)
+        error = self._errors.get(key)
+        if error is not None and now - error[0] < self._error_interval:
+            error[1] += 1
+            return
+
+        suppressed = error[1] if error is not None else 0
+        self._errors[key] = [now, 0]
+        if suppressed:
+            msg = f"{msg} (repeated {suppressed} times in the last {self._error_interval}s)"
+        self._logger.log(level, f"[{self._subsystem}] {msg}", *args, exc_info=self._logger.isEnabledFor(logging.DEBUG))
+
+
+def get_tracer(logger, subsystem):
+    return Tracer(logger, subsystem)
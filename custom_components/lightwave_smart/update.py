@@ -1,5 +1,5 @@
 import logging
-from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, SERVICE_SETBRIGHTNESS, CONF_HOMEKIT, DOMAIN
+from .const import LIGHTWAVE_LINK2, LIGHTWAVE_ENTITIES, LIGHTWAVE_SCHEDULER, SERVICE_SETBRIGHTNESS, CONF_HOMEKIT, DOMAIN
 from homeassistant.components.update import (
     UpdateDeviceClass,
     UpdateEntity, 
@@ -14,9 +14,13 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .utils import (
     make_device_info
 )
+from .entity import LWRF2Entity
+from .scheduler import PRIORITY_FIRMWARE
+from .trace import get_tracer
 
 DEPENDENCIES = ['lightwave_smart']
 _LOGGER = logging.getLogger(__name__)
+_TRACE = get_tracer(_LOGGER, "firmware")
 
 # https://developers.home-assistant.io/docs/core/entity/update/
 FIRMWARE_DESCRIPTION = UpdateEntityDescription(
@@ -32,27 +36,29 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
     fws = []
     link = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_LINK2]
     homekit = config_entry.options.get(CONF_HOMEKIT, False)
+    scheduler = hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_SCHEDULER]
     
     for device_id in link.get_device_ids():
         try:
             if link.devices[device_id].is_gen2():
-                fws.append(LWRF2Update(link.devices[device_id], homekit, FIRMWARE_DESCRIPTION))
+                fws.append(LWRF2Update(link.devices[device_id], homekit, scheduler, FIRMWARE_DESCRIPTION))
         except Exception as e: _LOGGER.exception("Could not add LWRF2Update")
 
     hass.data[DOMAIN][config_entry.entry_id][LIGHTWAVE_ENTITIES].extend(fws)
     async_add_entities(fws)
 
 
-class LWRF2Update(UpdateEntity):
+class LWRF2Update(LWRF2Entity, UpdateEntity):
     """Lightwave Firmware update entity."""
 
     _attr_should_poll = False
     _attr_assumed_state = False
 
-    def __init__(self, device, homekit, entity_description):
-        _LOGGER.debug(f"Adding Firmware update for device Id: {device.device_id}  name: {device.name}")
+    def __init__(self, device, homekit, scheduler, entity_description):
+        _LOGGER.debug("Adding Firmware update for device Id: %s  name: %s", device.device_id, device.name)
         self._device_id = device.device_id
         self._lwlink = device.link
+        self._scheduler = scheduler
 
         self.entity_description = entity_description
 
@@ -90,13 +96,13 @@ class LWRF2Update(UpdateEntity):
     @callback
     def async_update_callback(self, **kwargs):
         """Update the component's state."""
-        _LOGGER.debug(f"async_update_callback - Update update: {self.entity_id} - {self.entity_description.key} - {kwargs}")
+        _TRACE.debug("async_update_callback - Update update: %s - %s - %s", self.entity_id, self.entity_description.key, kwargs)
         try:
             self.latest_version = self._device.latest_firmware_version
             self.release_summary = self._device.latest_firmware_release_summary
             self.async_schedule_update_ha_state(True)
         except Exception as e: 
-            _LOGGER.warning(f"async_update_callback - error - {self.entity_id} - {e}")
+            _TRACE.report("async_update_callback - error - %s - %s", self.entity_id, e)
             
     @property
     def supported_features(self):
@@ -118,5 +124,6 @@ class LWRF2Update(UpdateEntity):
         """
         _LOGGER.debug(f"async_install - {self.entity_id} - {version} - {backup}")
         
-        self.in_progress = await self._device.update_firmware(version or self.latest_version)
+        self.in_progress = await self._scheduler.async_run(
+            self._device.update_firmware, version or self.latest_version, priority=PRIORITY_FIRMWARE)
         
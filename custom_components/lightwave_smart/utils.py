@@ -1,17 +1,24 @@
-from .const import DOMAIN
+from .const import DOMAIN, SENSOR_FEATURES
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import storage
 
 def make_device_info(entity, name = None):
+    """DeviceInfo of the entity's device, built once per device and shared (the link clears the cache when the hierarchy is read)."""
     device = entity._device
+    cache = entity._lwlink.device_info_cache
+    key = ("device", device.device_id, name, device.firmware_version)
+    device_info = cache.get(key)
+    if device_info is not None:
+        return device_info
+
     product_code = device.product_code
     if device.virtual_product_code:
         product_code += "-" + device.virtual_product_code
 
     via_device = entity._lwlink.get_linkPlus_featureset_id(device.device_id)
 
-    return DeviceInfo({
+    device_info = cache[key] = DeviceInfo({
         "identifiers": { (DOMAIN, device.device_id) },
         "name": name or device.name + " Device",
         "manufacturer": device.manufacturer_code,
@@ -20,8 +27,16 @@ def make_device_info(entity, name = None):
         "sw_version": device.firmware_version,
         "via_device": (DOMAIN, via_device),
     })
+    return device_info
     
 def make_entity_device_info(entity, name = None):
+    """DeviceInfo of the entity's featureset, built once per featureset and shared by its entities."""
+    cache = entity._lwlink.device_info_cache
+    key = ("featureset", entity._featureset_id, name)
+    device_info = cache.get(key)
+    if device_info is not None:
+        return device_info
+
     via_device = entity._lwlink.get_linkPlus_featureset_id(entity._featureset_id)
     if entity._gen2 and not entity._device.is_hub():
         via_device = entity._device.device_id
@@ -40,14 +55,23 @@ def make_entity_device_info(entity, name = None):
     if name:
         device_info["name"] = name
 
-    return DeviceInfo(device_info)
+    device_info = cache[key] = DeviceInfo(device_info)
+    return device_info
+
+def is_feature_changed(kwargs):
+    """Feature callbacks are also made when a read returns the value already held, those need no state write."""
+    return kwargs["prev_value"] != kwargs["new_value"]
 
 def get_extra_state_attributes(entity):
     """Return the optional state attributes."""
-    feature_set = entity._lwlink.featuresets[entity._featureset_id]
+    link = entity._lwlink
+    feature_set = link.featuresets[entity._featureset_id]
 
     attribs = {}
     for featurename, feature in feature_set.features.items():
+        if featurename in SENSOR_FEATURES and not link.is_feature_wanted(feature.id):
+            # not kept current while its own sensor is disabled
+            continue
         attribs['lwrf_' + featurename] = feature.state
     return attribs
 
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import timedelta
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+from lightwave_smart.message import LW_WebsocketMessage
+
+_LOGGER = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 5          # seconds between link checks, a probe is only sent once the link has been idle
+PROBE_TIMEOUT = 5           # seconds without a probe response before the socket is treated as stalled
+KEEP_ALIVE_MIN = 5
+KEEP_ALIVE_MAX = 600
+KEEP_ALIVE_GROWTH = 1.5     # adaptive, interval growth after KEEP_ALIVE_STREAK idle probes were answered
+KEEP_ALIVE_STREAK = 3
+KEEP_ALIVE_MARGIN = 0.8     # adaptive, fraction of the idle time at which a disconnect was seen that is kept as the ceiling
+BACKOFF_BASE = 2            # seconds, doubled on each failed reconnect attempt
+BACKOFF_MAX = 300
+RECONNECT_HISTORY = 20
+RECONNECT_WAIT = 30         # seconds async_reconnect_wait waits for a reconnect, which keeps retrying after that
+
+
+class KeepAliveTuner:
+    """Keep-alive interval, either fixed or adapted to the idle time the connection survives.
+
+    In adaptive mode the interval grows while idle probes keep being answered, up to a ceiling.
+    An idle disconnect lowers the ceiling below the idle time at which it happened, so the
+    interval settles at the longest idle time that is known to be safe.
+    """
+
+    def __init__(self, interval, adaptive):
+        self.interval = interval
+        self.adaptive = adaptive
+        self.ceiling = KEEP_ALIVE_MAX
+        self._streak = 0
+
+    def record_idle_probe(self, idle):
+        if not self.adaptive or idle < self.interval:
+            return
+        self._streak += 1
+        if self._streak >= KEEP_ALIVE_STREAK:
+            self._streak = 0
+            interval = min(self.ceiling, round(self.interval * KEEP_ALIVE_GROWTH))
+            if interval != self.interval:
+                _LOGGER.debug(f"KeepAliveTuner: Increasing keep-alive interval {self.interval}s -> {interval}s")
+                self.interval = interval
+
+    def record_idle_disconnect(self, idle):
+        if not self.adaptive or idle < KEEP_ALIVE_MIN:
+            # not idle, the disconnect has some other cause
+            return
+        self._streak = 0
+        self.ceiling = max(KEEP_ALIVE_MIN, min(self.ceiling, int(idle * KEEP_ALIVE_MARGIN)))
+        if self.interval > self.ceiling:
+            _LOGGER.info(f"KeepAliveTuner: Disconnected after {idle:.0f}s idle, reducing keep-alive interval {self.interval}s -> {self.ceiling}s")
+            self.interval = self.ceiling
+
+
+class LinkWatchdog:
+    """Monitor the health of the Lightwave link.
+
+    Once no message has been received for the keep-alive interval a lightweight request is sent,
+    which also measures the round trip latency. If it is not answered within the probe timeout
+    the socket is treated as stalled and the link is reconnected, retrying with exponential backoff
+    and jitter until a connection is made. Progress on the pending items of a bulk read counts as
+    activity, so a long read is not mistaken for a stall.
+    """
+
+    def __init__(self, hass, link, resync, keep_alive):
+        self._hass = hass
+        self._link = link
+        self._resync = resync
+        self.keep_alive = keep_alive
+        self._last_activity = time.monotonic()
+        self._pending_items = 0
+
+        self.latency = None             # ms, last successful probe
+        self.connected_since = None
+        self.reconnects = deque(maxlen=RECONNECT_HISTORY)   # (time, reason, attempts)
+
+        self._listeners = []
+        self._cancel = None
+        self._probing = False
+        self._reconnect_task = None
+
+    @property
+    def reconnecting(self):
+        return self._reconnect_task is not None
+
+    async def async_start(self):
+        self.connected_since = dt_util.utcnow()
+        self._last_activity = time.monotonic()
+        await self._link.async_register_general_callback(self._async_feature_event)
+        self._cancel = async_track_time_interval(self._hass, self._async_check, timedelta(seconds=CHECK_INTERVAL))
+
+    async def async_stop(self):
+        if self._cancel is not None:
+            self._cancel()
+            self._cancel = None
+        task = self._reconnect_task
+        if task is not None:
+            # a service call waiting on the reconnect sees it as not connected, the cancellation is not raised to it
+            task.cancel()
+            await asyncio.wait({task})
+            self._reconnect_task = None
+
+    def async_add_listener(self, update_callback):
+        """Listen for changes to the link health, returns a function to remove the listener."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def _async_feature_event(self, **kwargs):
+        self._last_activity = time.monotonic()
+
+    def _notify(self):
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def _set_disconnected(self):
+        if self.connected_since is not None or self.latency is not None:
+            self.connected_since = None
+            self.latency = None
+            self._notify()
+
+    async def async_probe(self):
+        """Send a lightweight request and return the round trip time in ms, None if unanswered."""
+        ws = self._link._ws
+        if ws._websocket is None or ws._websocket.closed:
+            # never send while closed, the library would start its own connect
+            return None
+
+        readmess = LW_WebsocketMessage("user", "rootGroups")
+        readmess.add_item()
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(ws.async_sendmessage(readmess, immediate=True), PROBE_TIMEOUT)
+        except Exception as e:
+            _LOGGER.debug(f"LinkWatchdog: Probe failed - {e!r}")
+            return None
+        return (time.monotonic() - start) * 1000
+
+    async def _async_check(self, _now=None):
+        if self._probing or self.reconnecting:
+            return
+
+        # read responses are not feature events, while a bulk read is answered its pending items
+        # count as activity (the probe would be queued behind the read)
+        pending_items = self._link._ws._pending_items_manager.count
+        if pending_items != self._pending_items:
+            self._pending_items = pending_items
+            self._last_activity = time.monotonic()
+
+        idle = time.monotonic() - self._last_activity
+        if self._link._ws._connectingTS:
+            # the library is already reconnecting a closed socket
+            if self.connected_since is not None:
+                self.keep_alive.record_idle_disconnect(idle)
+            self._set_disconnected()
+            return
+
+        if idle < self.keep_alive.interval and self.connected_since is not None:
+            # events are arriving, the link is alive
+            return
+
+        self._probing = True
+        try:
+            latency = await self.async_probe()
+        finally:
+            self._probing = False
+
+        if latency is None:
+            _LOGGER.warning("LinkWatchdog: No response from Lightwave within %ss, reconnecting", PROBE_TIMEOUT)
+            self.keep_alive.record_idle_disconnect(idle)
+            self.async_reconnect("stalled")
+            return
+
+        self.keep_alive.record_idle_probe(idle)
+        self._last_activity = time.monotonic()
+        self.latency = round(latency, 1)
+        if self.connected_since is None:
+            self.connected_since = dt_util.utcnow()
+        self._notify()
+
+    def async_reconnect(self, reason):
+        """Start a reconnect in the background, unless one is already running."""
+        if self._reconnect_task is None:
+            self._reconnect_task = self._hass.async_create_background_task(
+                self._async_reconnect(reason), "lightwave_smart watchdog reconnect"
+            )
+        return self._reconnect_task
+
+    async def async_reconnect_wait(self, reason, timeout=RECONNECT_WAIT):
+        """Start a reconnect and wait until it has connected, at most timeout seconds. Returns True if connected.
+
+        The reconnect is not cancelled by the timeout (nor by a cancelled caller), it keeps retrying
+        in the background until it connects or the watchdog is stopped.
+        """
+        task = self.async_reconnect(reason)
+        done, _pending = await asyncio.wait({task}, timeout=timeout)
+        return task in done and not task.cancelled() and task.exception() is None
+
+        self._set_disconnected()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    await self._link.async_deactivate(source=f"watchdog_{reason}")
+                    connected = await self._link.async_activate(
+                        max_tries=1, source=f"watchdog_{reason}", connect_callback=self._resync.async_on_connect
+                    )
+                except Exception as e:
+                    _LOGGER.warning(f"LinkWatchdog: Reconnect attempt {attempt} failed - {e}")
+                    connected = False
+
+                if connected:
+                    break
+
+                # full jitter, spreads out reconnects of many instances after an outage
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+                _LOGGER.info(f"LinkWatchdog: Reconnect attempt {attempt} failed, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            _LOGGER.info(f"LinkWatchdog: Reconnect cancelled after {attempt} attempt(s) - reason: {reason}")
+            raise
+        finally:
+            self._reconnect_task = None
+
+        _LOGGER.info(f"LinkWatchdog: Reconnected after {attempt} attempt(s) - reason: {reason}")
+        self.reconnects.append((dt_util.utcnow(), reason, attempt))
+        self.connected_since = dt_util.utcnow()
+        self._last_activity = time.monotonic()
+        self._notify()